@@ -0,0 +1,41 @@
+"""Environment shared by the benchmarks.
+
+Settings are read when ``src`` is first imported, so every benchmark calls
+``setup`` before importing anything from the app. Values already in the
+environment win, so DB_URL and the rest can still be pointed elsewhere.
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+PLACEHOLDERS = (
+    "SECRET_KEY",
+    "MAIL_USERNAME",
+    "MAIL_PASSWORD",
+    "MAIL_SERVER",
+    "CLOUDINARY_NAME",
+    "CLOUDINARY_API_KEY",
+    "CLOUDINARY_API_SECRET",
+)
+RATE_LIMITS = (
+    "RATE_LIMIT_DEFAULT",
+    "RATE_LIMIT_CONTACTS_WRITE",
+    "RATE_LIMIT_LOGIN",
+    "RATE_LIMIT_ME",
+)
+
+
+def setup(db_name: Optional[str] = None, raise_rate_limits: bool = False):
+    """Fill in placeholder secrets, a throwaway SQLite database named
+    ``db_name`` and, with ``raise_rate_limits``, limits too high to matter."""
+    if db_name is not None:
+        path = os.path.join(tempfile.mkdtemp(), db_name)
+        os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{path}")
+    for name in PLACEHOLDERS:
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("MAIL_FROM", "benchmark@example.com")
+    os.environ.setdefault("MAIL_PORT", "465")
+    if raise_rate_limits:
+        for name in RATE_LIMITS:
+            os.environ.setdefault(name, "1000000/minute")
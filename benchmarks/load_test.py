@@ -0,0 +1,280 @@
+"""Load-test the real app and compare the results with a stored baseline.
+
+Seeds N users x M contacts, then drives main.app in-process through httpx at
+each concurrency level and records p50/p95/p99 latency and throughput per
+endpoint:
+
+    python -m benchmarks.load_test --users 10 --contacts 1000 \\
+        --concurrency 1 16 --output results.json [--baseline baseline.json]
+
+Uses a throwaway SQLite database unless DB_URL is set; point DB_URL at a
+scratch Postgres database to load-test Postgres (tables are created, and the
+database must be empty). Rate limits are raised so they don't skew results.
+Set CONTACT_CACHE_TTL=0 to measure the uncached read path.
+
+With --baseline, exits 1 when any request failed, or when any endpoint's p95
+grows or its throughput drops by more than --threshold (a fraction, 0.2 by
+default).
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import _env
+
+_env.setup("load_test.db", raise_rate_limits=True)
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from main import app
+from src.database.db import sessionmanager
+from src.entity.models import Base, Contact, User
+from src.services.auth import create_access_token
+from src.utils.birthdays import birth_mmdd
+from src.utils.security import get_password_hash
+
+PASSWORD = "benchmark-password"
+ENDPOINTS = ("list", "search", "birthdays", "get", "login", "create")
+
+
+async def seed(users: int, contacts: int) -> list[dict]:
+    """Create the dataset; return each user's email, token and contact ids."""
+    async with sessionmanager.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    hashed = get_password_hash(PASSWORD)
+    async with sessionmanager.session() as session:
+        if (await session.execute(select(func.count(User.id)))).scalar():
+            raise SystemExit("DB_URL must point at an empty database")
+
+        result = await session.execute(
+            insert(User).returning(User.id, User.email),
+            [
+                {
+                    "email": f"user{u}@example.com",
+                    "hashed_password": hashed,
+                    "is_verified": True,
+                }
+                for u in range(users)
+            ],
+        )
+        accounts = [{"id": id_, "email": email} for id_, email in result.all()]
+        for account in accounts:
+            for start in range(0, contacts, 5000):
+                rows = []
+                for i in range(start, min(start + 5000, contacts)):
+                    birth_date = datetime(1970 + i % 40, i % 12 + 1, i % 28 + 1)
+                    rows.append(
+                        {
+                            "first_name": f"First{i}",
+                            "last_name": f"Last{i % 997}",
+                            "email": f"contact{i}@example.com",
+                            "phone_number": "+380501234567",
+                            "birth_date": birth_date,
+                            "birth_mmdd": birth_mmdd(birth_date),
+                            "user_id": account["id"],
+                        }
+                    )
+                await session.execute(insert(Contact), rows)
+            ids = await session.execute(
+                select(Contact.id).where(Contact.user_id == account["id"])
+            )
+            account["contact_ids"] = list(ids.scalars())
+            account["headers"] = {
+                "Authorization": f"Bearer {create_access_token({'sub': account['email']})}"
+            }
+        await session.commit()
+    return accounts
+
+
+def build_request(endpoint: str, account: dict, rng: random.Random, serial: int):
+    """Return (method, url, kwargs) for one request against ``endpoint``."""
+    headers = account["headers"]
+    if endpoint == "list":
+        return "GET", "/contacts/", {"params": {"limit": 50}, "headers": headers}
+    if endpoint == "search":
+        query = f"first{rng.randrange(100)}"
+        return (
+            "GET",
+            "/contacts/search",
+            {"params": {"query": query}, "headers": headers},
+        )
+    if endpoint == "birthdays":
+        days = rng.randint(1, 30)
+        return (
+            "GET",
+            "/contacts/birthdays",
+            {"params": {"days": days}, "headers": headers},
+        )
+    if endpoint == "get":
+        contact_id = rng.choice(account["contact_ids"])
+        return "GET", f"/contacts/{contact_id}", {"headers": headers}
+    if endpoint == "login":
+        body = {"email": account["email"], "password": PASSWORD}
+        return "POST", "/users/users/login", {"json": body}
+    if endpoint == "create":
+        body = {
+            "first_name": "Load",
+            "last_name": "Test",
+            "email": f"load{serial}@example.com",
+            "phone_number": "+380501234567",
+            "birth_date": "1990-06-15T00:00:00",
+        }
+        return "POST", "/contacts/", {"json": body, "headers": headers}
+    raise ValueError(endpoint)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    accounts: list[dict],
+    concurrency: int,
+    total: int,
+    seed_value: int,
+) -> dict:
+    rng = random.Random(seed_value)
+    plan = [
+        build_request(endpoint, rng.choice(accounts), rng, serial)
+        for serial in range(seed_value, seed_value + total)
+    ]
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while plan:
+            method, url, kwargs = plan.pop()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(total / elapsed, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for endpoint, levels in results["results"].items():
+        for level, current in levels.items():
+            previous = baseline.get("results", {}).get(endpoint, {}).get(level)
+            # A failing endpoint can look fast, so any error fails the check
+            if current["errors"]:
+                before = previous.get("errors", 0) if previous else "-"
+                regressions.append(
+                    f"{endpoint} @ {level}: errors {before} -> {current['errors']}"
+                )
+            if previous is None:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{endpoint} @ {level}: p95 {previous['p95_ms']} -> "
+                    f"{current['p95_ms']} ms"
+                )
+            if current["rps"] < previous["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{endpoint} @ {level}: throughput {previous['rps']} -> "
+                    f"{current['rps']} req/s"
+                )
+    return regressions
+
+
+async def run(args) -> dict:
+    async with app.router.lifespan_context(app):
+        accounts = await seed(args.users, args.contacts)
+        transport = httpx.ASGITransport(app=app)
+        results: dict = {endpoint: {} for endpoint in args.endpoints}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            serial = 0
+            for concurrency in args.concurrency:
+                for endpoint in args.endpoints:
+                    total = (
+                        args.login_requests if endpoint == "login" else args.requests
+                    )
+                    stats = await drive(
+                        client, endpoint, accounts, concurrency, total, serial
+                    )
+                    serial += total
+                    results[endpoint][str(concurrency)] = stats
+                    print(
+                        f"{endpoint:<10} c={concurrency:<4} p50 {stats['p50_ms']:>8.2f} ms"
+                        f"  p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms"
+                        f"  {stats['rps']:>8.1f} req/s  errors {stats['errors']}"
+                    )
+        dialect = sessionmanager.engine.dialect.name
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "dialect": dialect,
+            "python": platform.python_version(),
+            "users": args.users,
+            "contacts_per_user": args.contacts,
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--contacts", type=int, default=1000, help="per user")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument(
+        "--login-requests",
+        type=int,
+        default=50,
+        help="login runs bcrypt on every request, so it gets its own count",
+    )
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS)
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
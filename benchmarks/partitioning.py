@@ -0,0 +1,277 @@
+"""Compare repository queries on a plain and a hash-partitioned contacts table.
+
+Seeds a scratch PostgreSQL database, times every per-user repository query
+on the plain table, repartitions it online with the same code the migration
+uses, and times them again:
+
+    DB_URL=postgresql+asyncpg://.../scratch python -m benchmarks.partitioning \\
+        [--rows 10000000] [--users 10000] [--partitions 16] [--iterations 200]
+
+The database must be empty; tables are created from the models. Also reports
+how long the online repartitioning took, table and index sizes, and VACUUM
+time for the whole table and for one partition.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import _env
+
+_env.setup()
+
+from sqlalchemy import func, select, text
+
+from src.database.db import sessionmanager
+from src.database.partitioning import repartition_contacts
+from src.entity.models import Base, Contact, User
+from src.repository.contacts import ContactRepository
+from src.schemas.contacts import ContactCreate
+from src.schemas.users import UserResponse
+
+SEED_CHUNK = 1_000_000
+
+SEED_CONTACTS = text("""
+    INSERT INTO contacts (
+        first_name, last_name, email, phone_number, phone_e164, birth_date,
+        birth_mmdd, user_id, created_at, updated_at
+    )
+    SELECT
+        'First' || g, 'Last' || (g % 997), 'contact' || g || '@example.com',
+        '+38050' || lpad((g % 10000000)::text, 7, '0'),
+        '+38050' || lpad((g % 10000000)::text, 7, '0'),
+        make_date(1970 + g % 40, g % 12 + 1, g % 28 + 1),
+        (g % 12 + 1) * 100 + g % 28 + 1,
+        1 + g % :users,
+        now() - (g % 1000) * interval '1 hour',
+        now() - (g % 1000) * interval '1 hour'
+    FROM generate_series(CAST(:low AS integer), CAST(:high AS integer)) AS g
+    """)
+
+
+async def seed(rows: int, users: int):
+    async with sessionmanager.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmanager.session() as session:
+        if (await session.execute(select(func.count(User.id)))).scalar():
+            raise SystemExit("DB_URL must point at an empty database")
+        await session.execute(
+            text(
+                "INSERT INTO users (email, hashed_password, is_verified, "
+                "contacts_version, created_at) "
+                "SELECT 'bench' || u || '@example.com', '-', true, 0, now() "
+                "FROM generate_series(1, CAST(:users AS integer)) AS u"
+            ),
+            {"users": users},
+        )
+        await session.commit()
+        for low in range(0, rows, SEED_CHUNK):
+            high = min(low + SEED_CHUNK, rows) - 1
+            await session.execute(
+                SEED_CONTACTS, {"users": users, "low": low, "high": high}
+            )
+            await session.commit()
+            print(f"seeded {high + 1} contacts", flush=True)
+
+    async with sessionmanager.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE contacts")
+
+
+async def sample_users(count: int, users: int) -> list[tuple[UserResponse, list]]:
+    """Random users with a few of their contacts' ``(id, phone_e164)``."""
+    rng = random.Random(0)
+    sample = []
+    async with sessionmanager.session() as session:
+        for user_id in rng.sample(range(1, users + 1), min(count, users)):
+            user = await session.get(User, user_id)
+            contacts = await session.execute(
+                select(Contact.id, Contact.phone_e164)
+                .where(Contact.user_id == user_id)
+                .limit(20)
+            )
+            sample.append((UserResponse.model_validate(user), contacts.all()))
+    return sample
+
+
+def workload(user: UserResponse, contacts: list, rng: random.Random):
+    """(label, coroutine factory) for each per-user repository query."""
+    contact_id, phone = rng.choice(contacts)
+    changed = ContactCreate(
+        first_name="Bench",
+        last_name="Updated",
+        email=f"updated{contact_id}@example.com",
+        phone_number=phone,
+        birth_date=datetime(1990, 1, 1),
+    )
+    since = datetime.now(timezone.utc) - timedelta(hours=rng.randint(1, 48))
+    return [
+        ("get_page(id)", lambda db: ContactRepository(db).get_page(user, 50)),
+        (
+            "get_page(name)",
+            lambda db: ContactRepository(db).get_page(
+                user, 50, ["Last5", "First5", 5], "name"
+            ),
+        ),
+        ("get_by_id", lambda db: ContactRepository(db).get_by_id(contact_id, user)),
+        (
+            "search",
+            lambda db: ContactRepository(db).search_contacts("last12", user),
+        ),
+        (
+            "birthdays",
+            lambda db: ContactRepository(db).get_upcoming_birthdays(user, 7),
+        ),
+        (
+            "get_by_phones",
+            lambda db: ContactRepository(db).get_by_phones([phone], user),
+        ),
+        (
+            "get_changes",
+            lambda db: ContactRepository(db).get_changes(user, 100, (since, None, 0)),
+        ),
+        (
+            "update",
+            lambda db: ContactRepository(db).update(contact_id, changed, user),
+        ),
+    ]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def measure(sample, iterations: int) -> dict[str, list[float]]:
+    rng = random.Random(1)
+    timings: dict[str, list[float]] = {}
+    for _ in range(iterations):
+        user, contacts = rng.choice(sample)
+        for label, run in workload(user, contacts, rng):
+            async with sessionmanager.session() as db:
+                started = time.perf_counter()
+                await run(db)
+                timings.setdefault(label, []).append(time.perf_counter() - started)
+    return timings
+
+
+async def table_stats() -> dict:
+    """Total size, largest index and VACUUM times of contacts."""
+    async with sessionmanager.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # pg_partition_tree() returns nothing for a plain table
+        tables = (
+            await conn.exec_driver_sql(
+                "SELECT relid::regclass::text FROM pg_partition_tree('contacts') "
+                "WHERE isleaf"
+            )
+        ).scalars().all() or ["contacts"]
+        total, largest_index = (
+            await conn.execute(
+                text(
+                    "SELECT sum(pg_total_relation_size(relid)), "
+                    "(SELECT max(pg_relation_size(indexrelid)) FROM pg_index "
+                    "WHERE indrelid = ANY(CAST(:tables AS regclass[]))) "
+                    "FROM unnest(CAST(:tables AS regclass[])) AS relid"
+                ),
+                {"tables": tables},
+            )
+        ).one()
+
+        started = time.perf_counter()
+        await conn.exec_driver_sql("VACUUM (ANALYZE, DISABLE_PAGE_SKIPPING) contacts")
+        vacuum_all = time.perf_counter() - started
+        started = time.perf_counter()
+        await conn.exec_driver_sql(
+            f"VACUUM (ANALYZE, DISABLE_PAGE_SKIPPING) {tables[0]}"
+        )
+        vacuum_one = time.perf_counter() - started
+    return {
+        "tables": len(tables),
+        "size_mb": total / 2**20,
+        "largest_index_mb": largest_index / 2**20,
+        "vacuum_all_s": vacuum_all,
+        "vacuum_one_s": vacuum_one,
+    }
+
+
+async def repartition(partitions: int) -> float:
+    async with sessionmanager.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        started = time.perf_counter()
+        await conn.run_sync(repartition_contacts, partitions, 50_000)
+        elapsed = time.perf_counter() - started
+        # Same starting point as the freshly seeded plain table
+        await conn.exec_driver_sql("VACUUM ANALYZE contacts")
+        return elapsed
+
+
+def report(plain: dict, partitioned: dict):
+    print(f"\n{'query':<16}{'plain p50/p95 ms':>22}{'partitioned p50/p95 ms':>28}")
+    for label in plain:
+        cells = [
+            f"{percentile(timings[label], 50) * 1000:.2f} / "
+            f"{percentile(timings[label], 95) * 1000:.2f}"
+            for timings in (plain, partitioned)
+        ]
+        print(f"{label:<16}{cells[0]:>22}{cells[1]:>28}")
+
+
+def report_stats(plain: dict, partitioned: dict):
+    print(f"\n{'table':<24}{'plain':>14}{'partitioned':>14}")
+    rows = [
+        ("leaf tables", "tables", "{:.0f}"),
+        ("total size (MB)", "size_mb", "{:.1f}"),
+        ("largest index (MB)", "largest_index_mb", "{:.1f}"),
+        ("VACUUM all (s)", "vacuum_all_s", "{:.2f}"),
+        ("VACUUM one leaf (s)", "vacuum_one_s", "{:.2f}"),
+    ]
+    for title, key, fmt in rows:
+        print(
+            f"{title:<24}{fmt.format(plain[key]):>14}"
+            f"{fmt.format(partitioned[key]):>14}"
+        )
+
+
+async def run(args):
+    sessionmanager.init()
+    try:
+        if sessionmanager.engine.dialect.name != "postgresql":
+            raise SystemExit("Partitioning benchmarks need a PostgreSQL DB_URL")
+        await seed(args.rows, args.users)
+        sample = await sample_users(args.sample_users, args.users)
+
+        plain = await measure(sample, args.iterations)
+        plain_stats = await table_stats()
+
+        elapsed = await repartition(args.partitions)
+        print(f"\nrepartitioned into {args.partitions} partitions in {elapsed:.1f} s")
+        partitioned = await measure(sample, args.iterations)
+        partitioned_stats = await table_stats()
+    finally:
+        await sessionmanager.close()
+
+    report(plain, partitioned)
+    report_stats(plain_stats, partitioned_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sample-users", type=int, default=100)
+    args = parser.parse_args()
+    if "DB_URL" not in os.environ:
+        sys.exit("Set DB_URL to a scratch PostgreSQL database")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Count the SQL statements each contacts endpoint issues.
+
+Runs the real app against a throwaway SQLite database:
+
+    python -m benchmarks.query_counts
+"""
+
+import asyncio
+from collections import Counter
+
+from benchmarks import _env
+
+_env.setup("query_counts.db")
+
+import httpx
+from sqlalchemy import event
+
+from main import app
+from src.database.db import sessionmanager
+from src.entity.models import Base, User
+from src.services.auth import create_access_token
+from src.utils.security import get_password_hash
+
+CONTACT = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "email": "ada@example.com",
+    "phone_number": "+380501234567",
+    "birth_date": "1990-12-10T00:00:00",
+}
+
+
+async def main():
+    sessionmanager.init()
+    async with sessionmanager.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmanager.session() as session:
+        session.add(
+            User(
+                email="bench@example.com",
+                hashed_password=get_password_hash("secret"),
+                is_verified=True,
+            )
+        )
+        await session.commit()
+
+    statements = Counter()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[current] += 1
+
+    event.listen(sessionmanager.engine.sync_engine, "before_cursor_execute", count)
+    headers = {
+        "Authorization": f"Bearer {create_access_token({'sub': 'bench@example.com'})}"
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        current = "warm-up"
+        await client.get("/contacts/", headers=headers)
+
+        current = "POST /contacts"
+        response = await client.post("/contacts/", json=CONTACT, headers=headers)
+        contact_id = response.json()["id"]
+        for current, method, path, body in (
+            ("GET /contacts", "GET", "/contacts/", None),
+            ("GET /contacts/{id}", "GET", f"/contacts/{contact_id}", None),
+            ("PUT /contacts/{id}", "PUT", f"/contacts/{contact_id}", CONTACT),
+            ("DELETE /contacts/{id}", "DELETE", f"/contacts/{contact_id}", None),
+        ):
+            response = await client.request(method, path, json=body, headers=headers)
+            response.raise_for_status()
+
+    del statements["warm-up"]
+    for endpoint, total in statements.items():
+        print(f"{endpoint:<24}{total}")
+    await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Measure the per-request cost of the shared rate limiter.
+
+Drives a trivial endpoint through the same middleware and key function as
+the app, with the limiter disabled and enabled:
+
+    python -m benchmarks.rate_limit_overhead [requests] [storage_uri]
+"""
+
+import asyncio
+import sys
+import time
+
+from benchmarks import _env
+
+_env.setup()
+
+import httpx
+from fastapi import FastAPI
+from slowapi import Limiter
+
+from src.conf.limiter import RateLimitMiddleware, user_or_ip_key
+from src.services.auth import create_access_token
+
+
+def build_app(storage_uri: str, enabled: bool) -> FastAPI:
+    app = FastAPI()
+    app.state.limiter = Limiter(
+        key_func=user_or_ip_key,
+        key_style="endpoint",
+        default_limits=["1000000000/minute"],
+        storage_uri=storage_uri,
+        strategy="sliding-window-counter",
+        enabled=enabled,
+    )
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(100):
+            await client.get("/ping", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping", headers=headers)
+        return (time.perf_counter() - start) / requests
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    storage_uri = sys.argv[2] if len(sys.argv) > 2 else "memory://"
+    token = create_access_token({"sub": "bench@example.com"})
+
+    for label, headers in (
+        ("anonymous (per-IP key)", {}),
+        ("authenticated (per-user key)", {"Authorization": f"Bearer {token}"}),
+    ):
+        baseline = await run(build_app(storage_uri, False), requests, headers)
+        limited = await run(build_app(storage_uri, True), requests, headers)
+        print(
+            f"{label:<30} disabled {baseline * 1e6:8.1f} us  "
+            f"enabled {limited * 1e6:8.1f} us  "
+            f"overhead {(limited - baseline) * 1e6:8.1f} us/request"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
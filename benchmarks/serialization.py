@@ -0,0 +1,118 @@
+"""Compare the ORM + response_model list path with the column-row + orjson path.
+
+Seeds a throwaway SQLite database and, for each size, times loading N contacts
+and rendering the response body both ways:
+
+    python -m benchmarks.serialization [sizes...]    # default: 1000 10000 100000
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import _env
+
+_env.setup("serialization.db")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import insert, select
+
+from src.database.db import sessionmanager
+from src.entity.models import Base, Contact, User
+from src.repository.contacts import CONTACT_COLUMNS
+from src.schemas.contacts import ContactResponse
+from src.utils.birthdays import birth_mmdd
+from src.utils.responses import ContactJSONResponse
+
+RESPONSE_FIELD = create_model_field("Response", list[ContactResponse])
+REPEAT = 3
+
+
+async def seed(user_id: int, total: int):
+    async with sessionmanager.session() as session:
+        for start in range(0, total, 5000):
+            rows = []
+            for i in range(start, min(start + 5000, total)):
+                birth_date = datetime(1980 + i % 30, i % 12 + 1, i % 28 + 1)
+                rows.append(
+                    {
+                        "first_name": f"First{i}",
+                        "last_name": f"Last{i}",
+                        "email": f"contact{i}@example.com",
+                        "phone_number": "+380501234567",
+                        "birth_date": birth_date,
+                        "birth_mmdd": birth_mmdd(birth_date),
+                        "additional_info": "benchmark" if i % 2 else None,
+                        "user_id": user_id,
+                    }
+                )
+            await session.execute(insert(Contact), rows)
+        await session.commit()
+
+
+async def orm_path(user_id: int, size: int) -> bytes:
+    """What the list routes did before: entities validated via response_model."""
+    async with sessionmanager.session() as session:
+        result = await session.execute(
+            select(Contact)
+            .where(Contact.user_id == user_id)
+            .order_by(Contact.id)
+            .limit(size)
+        )
+        contacts = result.scalars().all()
+    content = await serialize_response(
+        field=RESPONSE_FIELD, response_content=contacts, is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+async def row_path(user_id: int, size: int) -> bytes:
+    async with sessionmanager.session() as session:
+        result = await session.execute(
+            select(*CONTACT_COLUMNS)
+            .where(Contact.user_id == user_id)
+            .order_by(Contact.id)
+            .limit(size)
+        )
+        contacts = [dict(row) for row in result.mappings()]
+    return ContactJSONResponse(contacts).body
+
+
+async def best_of(path, user_id: int, size: int):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        body = await path(user_id, size)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+async def main(sizes: list[int]):
+    sessionmanager.init()
+    async with sessionmanager.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmanager.session() as session:
+        user = User(email="bench@example.com", hashed_password="x", is_verified=True)
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+    await seed(user_id, max(sizes))
+
+    print(f"{'contacts':>10}{'orm + pydantic':>18}{'rows + orjson':>18}{'speedup':>10}")
+    for size in sizes:
+        orm_time, orm_body = await best_of(orm_path, user_id, size)
+        row_time, row_body = await best_of(row_path, user_id, size)
+        assert json.loads(orm_body) == json.loads(row_body), "responses differ"
+        print(
+            f"{size:>10}{orm_time * 1000:>15.1f} ms{row_time * 1000:>15.1f} ms"
+            f"{orm_time / row_time:>9.1f}x"
+        )
+    await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]))
@@ -1,25 +1,53 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from slowapi import Limiter
+from fastapi.staticfiles import StaticFiles
 from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 
+from src.conf.config import settings
+from src.conf.events import contact_events
+from src.conf.limiter import RateLimitMiddleware, limiter
+from src.database.db import sessionmanager
+from src.services.metrics import MetricsMiddleware
 from src.routes.contacts import router as contacts_router
+from src.routes.metrics import router as metrics_router
 from src.routes.users import router as users_router
+from src.utils.body_limit import BodySizeLimitMiddleware
+from src.utils.security import PasswordHasherBusy, password_hasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sessionmanager.init()
+    await contact_events.start()
+    yield
+    await contact_events.stop()
+    await sessionmanager.close()
+    password_hasher.shutdown()
 
-# Setup limiter (without app.state)
-limiter = Limiter(key_func=get_remote_address)
 
 # Create app
 app = FastAPI(
     title="Contacts API",
     description="API for managing contacts",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
 from fastapi.middleware.cors import CORSMiddleware
 
+# Refuse oversized avatars before the multipart body is spooled; the slack
+# covers the part headers and boundaries around the file.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    route_name="upload_avatar",
+    max_bytes=settings.AVATAR_MAX_BYTES + 64 * 1024,
+    detail="Avatar file is too large",
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +57,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shared limiter: default limits apply to every route through the middleware,
+# decorated routes use their own policy.
+app.state.limiter = limiter
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 
 # Register exception handler directly
 @app.exception_handler(RateLimitExceeded)
@@ -39,9 +73,27 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     )
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server is busy. Please try again later."},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Include routers
 app.include_router(contacts_router, prefix="/contacts", tags=["Contacts"])
 app.include_router(users_router, prefix="/users", tags=["Users"])
+app.include_router(metrics_router, tags=["Metrics"])
+
+if settings.AVATAR_STORAGE == "local":
+    Path(settings.AVATAR_LOCAL_DIR).mkdir(parents=True, exist_ok=True)
+    app.mount(
+        settings.AVATAR_LOCAL_URL,
+        StaticFiles(directory=settings.AVATAR_LOCAL_DIR),
+        name="avatars",
+    )
 
 
 # Root route
@@ -22,6 +22,15 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", settings.DB_URL)
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip search objects that are managed by raw DDL, not by the models."""
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "table" and name.startswith("contacts_fts"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -30,6 +39,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -38,7 +48,11 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection: Connection) -> None:
     """Run migrations in 'online' mode."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
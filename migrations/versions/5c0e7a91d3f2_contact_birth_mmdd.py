@@ -0,0 +1,85 @@
+"""contact birth_mmdd
+
+Revision ID: 5c0e7a91d3f2
+Revises: bed75b02269b
+Create Date: 2026-10-18 10:21:57.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c0e7a91d3f2"
+down_revision: Union[str, None] = "bed75b02269b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A batch rebuild of contacts on SQLite drops these, so they are restored
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("contacts", sa.Column("birth_mmdd", sa.Integer(), nullable=True))
+
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    if is_postgres:
+        op.execute(
+            """
+            UPDATE contacts SET birth_mmdd =
+                EXTRACT(MONTH FROM birth_date AT TIME ZONE 'UTC') * 100
+                + EXTRACT(DAY FROM birth_date AT TIME ZONE 'UTC')
+            """
+        )
+    else:
+        op.execute(
+            """
+            UPDATE contacts SET birth_mmdd =
+                CAST(strftime('%m', birth_date) AS INTEGER) * 100
+                + CAST(strftime('%d', birth_date) AS INTEGER)
+            """
+        )
+
+    if is_postgres:
+        op.alter_column("contacts", "birth_mmdd", nullable=False)
+    else:
+        # SQLite cannot add NOT NULL in place
+        with op.batch_alter_table("contacts", recreate="always") as batch_op:
+            batch_op.alter_column(
+                "birth_mmdd", existing_type=sa.Integer(), nullable=False
+            )
+        for trigger in SQLITE_FTS_TRIGGERS:
+            op.execute(trigger)
+    op.create_index(
+        "ix_contacts_user_id_birth_mmdd", "contacts", ["user_id", "birth_mmdd"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_birth_mmdd", table_name="contacts")
+    op.drop_column("contacts", "birth_mmdd")
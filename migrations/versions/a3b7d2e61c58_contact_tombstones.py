@@ -0,0 +1,81 @@
+"""contact tombstones and delta sync index
+
+Revision ID: a3b7d2e61c58
+Revises: f2c6a8d40e19
+Create Date: 2026-10-18 18:05:42.730915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3b7d2e61c58"
+down_revision: Union[str, None] = "f2c6a8d40e19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_INDEX = "ix_contacts_user_id_updated_at_id"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "contact_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_contact_tombstones_user_id_deleted_at_contact_id",
+        "contact_tombstones",
+        ["user_id", "deleted_at", "contact_id"],
+        unique=False,
+    )
+    # Delta sync cannot order rows without a timestamp
+    op.execute(
+        "UPDATE contacts SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP) "
+        "WHERE updated_at IS NULL"
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        # See f2c6a8d40e19: a failed build leaves an INVALID index to drop
+        with op.get_context().autocommit_block():
+            op.create_index(
+                SYNC_INDEX,
+                "contacts",
+                ["user_id", "updated_at", "id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        return
+    op.create_index(SYNC_INDEX, "contacts", ["user_id", "updated_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                SYNC_INDEX,
+                table_name="contacts",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    else:
+        op.drop_index(SYNC_INDEX, table_name="contacts")
+    op.drop_index(
+        "ix_contact_tombstones_user_id_deleted_at_contact_id",
+        table_name="contact_tombstones",
+    )
+    op.drop_table("contact_tombstones")
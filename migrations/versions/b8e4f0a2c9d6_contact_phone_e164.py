@@ -0,0 +1,92 @@
+"""contact phone_e164
+
+Revision ID: b8e4f0a2c9d6
+Revises: a3b7d2e61c58
+Create Date: 2026-10-18 18:42:09.215377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.phones import to_e164
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f0a2c9d6"
+down_revision: Union[str, None] = "a3b7d2e61c58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+contacts = sa.table(
+    "contacts",
+    sa.column("id", sa.Integer),
+    sa.column("phone_number", sa.String),
+    sa.column("phone_e164", sa.String),
+)
+
+
+def backfill(conn) -> None:
+    """Normalize existing numbers in id order, one batch per statement.
+
+    Parsing happens in Python, so rows are walked by id rather than updated
+    with a single statement; on Postgres each batch commits on its own and
+    holds its row locks only briefly.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(contacts.c.id, contacts.c.phone_number)
+            .where(contacts.c.id > last_id)
+            .order_by(contacts.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        values = [
+            {"contact_id": row.id, "e164": to_e164(row.phone_number)}
+            for row in rows
+        ]
+        values = [value for value in values if value["e164"]]
+        if values:
+            conn.execute(
+                contacts.update()
+                .where(contacts.c.id == sa.bindparam("contact_id"))
+                .values(phone_e164=sa.bindparam("e164")),
+                values,
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "contacts", sa.Column("phone_e164", sa.String(length=16), nullable=True)
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        # See f2c6a8d40e19: a failed build leaves an INVALID index to drop
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_contacts_user_id_phone_e164",
+                "contacts",
+                ["user_id", "phone_e164"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            backfill(op.get_bind())
+        return
+
+    op.create_index(
+        "ix_contacts_user_id_phone_e164", "contacts", ["user_id", "phone_e164"]
+    )
+    backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_phone_e164", table_name="contacts")
+    op.drop_column("contacts", "phone_e164")
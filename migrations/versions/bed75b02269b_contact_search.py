@@ -0,0 +1,92 @@
+"""contact search
+
+Revision ID: bed75b02269b
+Revises: 74dd167bbf4d
+Create Date: 2026-10-18 09:40:13.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bed75b02269b"
+down_revision: Union[str, None] = "74dd167bbf4d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE contacts ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector(
+                    'simple',
+                    coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' '
+                    || regexp_replace(coalesce(email, ''), '[^[:alnum:]]+', ' ', 'g')
+                )
+            ) STORED
+            """
+        )
+        op.create_index(
+            "ix_contacts_search_vector",
+            "contacts",
+            ["search_vector"],
+            postgresql_using="gin",
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE contacts_fts USING fts5(
+                first_name, last_name, email,
+                content='contacts', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 0'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+                INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+                VALUES (new.id, new.first_name, new.last_name, new.email);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+                INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+                VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN
+                INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+                VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+                INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+                VALUES (new.id, new.first_name, new.last_name, new.email);
+            END
+            """
+        )
+        op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_contacts_search_vector", table_name="contacts")
+        op.drop_column("contacts", "search_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS contacts_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS contacts_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS contacts_fts_ai")
+        op.execute("DROP TABLE IF EXISTS contacts_fts")
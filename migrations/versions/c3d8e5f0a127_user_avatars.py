@@ -0,0 +1,28 @@
+"""user avatars
+
+Revision ID: c3d8e5f0a127
+Revises: 9a4f1c27e8b6
+Create Date: 2026-10-18 12:47:05.318840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d8e5f0a127"
+down_revision: Union[str, None] = "9a4f1c27e8b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("avatars", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "avatars")
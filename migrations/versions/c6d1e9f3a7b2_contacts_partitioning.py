@@ -0,0 +1,39 @@
+"""hash-partition contacts by user_id
+
+Revision ID: c6d1e9f3a7b2
+Revises: b8e4f0a2c9d6
+Create Date: 2026-10-18 19:20:51.604472
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.conf.config import settings
+from src.database.partitioning import partition_count, repartition_contacts
+
+# revision identifiers, used by Alembic.
+revision: str = "c6d1e9f3a7b2"
+down_revision: Union[str, None] = "b8e4f0a2c9d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Opt-in and Postgres only; otherwise contacts stays a plain table
+    if op.get_bind().dialect.name != "postgresql" or not settings.CONTACTS_PARTITIONS:
+        return
+    # Each copy batch commits on its own; see src/database/partitioning.py
+    with op.get_context().autocommit_block():
+        repartition_contacts(op.get_bind(), settings.CONTACTS_PARTITIONS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        if partition_count(op.get_bind()):
+            repartition_contacts(op.get_bind(), 0)
@@ -0,0 +1,33 @@
+"""user contacts version
+
+Revision ID: d71b2e9c4a80
+Revises: c3d8e5f0a127
+Create Date: 2026-10-18 13:20:41.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d71b2e9c4a80"
+down_revision: Union[str, None] = "c3d8e5f0a127"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "contacts_version", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "contacts_version")
@@ -0,0 +1,37 @@
+"""digest runs
+
+Revision ID: e8f2a4c6b1d9
+Revises: c6d1e9f3a7b2
+Create Date: 2026-10-18 20:14:37.508126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f2a4c6b1d9"
+down_revision: Union[str, None] = "c6d1e9f3a7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "digest_runs",
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("run_date", sa.Date(), nullable=False),
+        sa.Column("last_user_id", sa.Integer(), nullable=False),
+        sa.Column("digests", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("kind", "run_date"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("digest_runs")
@@ -0,0 +1,107 @@
+"""contact indexes and per-user email uniqueness
+
+Revision ID: f2c6a8d40e19
+Revises: e5a9c3f17b42
+Create Date: 2026-10-18 14:41:36.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c6a8d40e19"
+down_revision: Union[str, None] = "e5a9c3f17b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_contacts_user_id_id", ["user_id", "id"], False),
+    (
+        "ix_contacts_user_id_last_name_first_name",
+        ["user_id", "last_name", "first_name"],
+        False,
+    ),
+    ("uq_contacts_user_id_email", ["user_id", "email"], True),
+]
+
+# A batch rebuild of contacts on SQLite drops these, so they are restored
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside a transaction and does not block
+        # writes while the index builds. A failed build leaves an INVALID
+        # index behind that must be dropped before retrying.
+        with op.get_context().autocommit_block():
+            for name, columns, unique in INDEXES:
+                op.create_index(
+                    name,
+                    "contacts",
+                    columns,
+                    unique=unique,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+        # The per-user index is in place before the global one goes away
+        op.drop_constraint("contacts_email_key", "contacts", type_="unique")
+        return
+
+    for name, columns, unique in INDEXES:
+        op.create_index(name, "contacts", columns, unique=unique)
+    # SQLite cannot drop the unnamed UNIQUE(email) in place
+    with op.batch_alter_table(
+        "contacts",
+        recreate="always",
+        naming_convention={"uq": "uq_%(table_name)s_%(column_0_name)s"},
+    ) as batch_op:
+        batch_op.drop_constraint("uq_contacts_email", type_="unique")
+    for trigger in SQLITE_FTS_TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_unique_constraint("contacts_email_key", "contacts", ["email"])
+        with op.get_context().autocommit_block():
+            for name, _, _ in reversed(INDEXES):
+                op.drop_index(
+                    name,
+                    table_name="contacts",
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+        return
+
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="contacts")
+    with op.batch_alter_table("contacts", recreate="always") as batch_op:
+        batch_op.create_unique_constraint("uq_contacts_email", ["email"])
+    for trigger in SQLITE_FTS_TRIGGERS:
+        op.execute(trigger)
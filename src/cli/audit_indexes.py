@@ -0,0 +1,335 @@
+"""EXPLAIN every repository query against a large seeded dataset.
+
+Seeds a scratch database that is already migrated to head, runs each
+repository query while capturing the SQL it sends, and EXPLAINs every
+captured statement:
+
+    DB_URL=... alembic upgrade head
+    DB_URL=... python -m src.cli.audit_indexes [--users 20] [--contacts 5000]
+
+Exits with status 1 if any statement scans a whole table holding at least
+--min-rows rows, or, when contacts is partitioned (CONTACTS_PARTITIONS),
+reads more than one of its partitions. Supports PostgreSQL and SQLite.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, func, insert, select, text
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.entity.models import Base, Contact, User
+from src.repository.contacts import ContactRepository
+from src.repository.digests import DigestRepository
+from src.repository.outbox import OutboxRepository, utcnow
+from src.repository.tokens import RevokedTokenRepository
+from src.repository.users import UserRepository
+from src.schemas.contacts import BatchCreate, BatchDelete, BatchUpdate, ContactCreate
+from src.schemas.users import UserResponse
+from src.utils.birthdays import birth_mmdd
+
+PARTITION = re.compile(r"_p\d+$")
+
+
+async def seed(users: int, contacts: int) -> list[int]:
+    async with sessionmanager.session() as session:
+        result = await session.execute(
+            insert(User).returning(User.id),
+            [
+                {
+                    "email": f"audit{i}@example.com",
+                    "hashed_password": "-",
+                    "is_verified": True,
+                }
+                for i in range(users)
+            ],
+        )
+        user_ids = list(result.scalars())
+        for user_id in user_ids:
+            for start in range(0, contacts, 5000):
+                rows = []
+                for i in range(start, min(start + 5000, contacts)):
+                    birth_date = datetime(1970 + i % 40, i % 12 + 1, i % 28 + 1)
+                    rows.append(
+                        {
+                            "first_name": f"First{i}",
+                            "last_name": f"Last{i % 997}",
+                            "email": f"contact{i}@example.com",
+                            "phone_number": f"+38050{i:07d}",
+                            "phone_e164": f"+38050{i:07d}",
+                            "birth_date": birth_date,
+                            "birth_mmdd": birth_mmdd(birth_date),
+                            "user_id": user_id,
+                        }
+                    )
+                await session.execute(insert(Contact), rows)
+        await session.commit()
+    return user_ids
+
+
+async def collect(rows) -> list:
+    return [row async for row in rows]
+
+
+def workload(user: UserResponse, contact_id: int):
+    """(label, coroutine factory) for every query the repositories issue."""
+    contact = ContactCreate(
+        first_name="Audit",
+        last_name="Last1",
+        email="contact1@example.com",
+        phone_number="+380501234567",
+        birth_date=datetime(1990, 1, 1),
+    )
+    renamed = contact.model_copy(update={"email": "audit@example.com"})
+    # Seeded contacts of one user have consecutive ids
+    batch = [
+        BatchCreate(
+            op="create", data=contact.model_copy(update={"email": "new@example.com"})
+        ),
+        BatchUpdate(
+            op="update",
+            id=contact_id + 1,
+            data=contact.model_copy(update={"email": "batch@example.com"}),
+        ),
+        BatchDelete(op="delete", id=contact_id + 2),
+    ]
+    return [
+        ("contacts.get_version", lambda db: ContactRepository(db).get_version(user)),
+        (
+            "contacts.get_page(id)",
+            lambda db: ContactRepository(db).get_page(user, 50, [100], "id"),
+        ),
+        (
+            "contacts.get_page(name)",
+            lambda db: ContactRepository(db).get_page(
+                user, 50, ["Last5", "First5", 5], "name"
+            ),
+        ),
+        (
+            "contacts.search",
+            lambda db: ContactRepository(db).search_contacts("first12", user),
+        ),
+        (
+            "contacts.birthdays",
+            lambda db: ContactRepository(db).get_upcoming_birthdays(user, 7),
+        ),
+        (
+            "contacts.get_by_phones",
+            lambda db: ContactRepository(db).get_by_phones(
+                ["+380500000001", "+380500000002"], user
+            ),
+        ),
+        (
+            "contacts.get_changes",
+            lambda db: ContactRepository(db).get_changes(
+                user, 100, (utcnow() - timedelta(days=1), None, 0)
+            ),
+        ),
+        (
+            "contacts.get_by_id",
+            lambda db: ContactRepository(db).get_by_id(contact_id, user),
+        ),
+        (
+            "contacts.insert_many",
+            lambda db: ContactRepository(db).insert_many(
+                [
+                    {
+                        **contact.model_dump(),
+                        "user_id": user.id,
+                        "birth_mmdd": birth_mmdd(contact.birth_date),
+                    }
+                ],
+                user,
+                upsert=True,
+            ),
+        ),
+        (
+            "contacts.update",
+            lambda db: ContactRepository(db).update(contact_id, renamed, user),
+        ),
+        ("contacts.delete", lambda db: ContactRepository(db).delete(contact_id, user)),
+        (
+            "contacts.apply_batch",
+            lambda db: ContactRepository(db).apply_batch(batch, user, atomic=True),
+        ),
+        ("users.get_by_email", lambda db: UserRepository.get_by_email(db, user.email)),
+        (
+            "tokens.is_revoked",
+            lambda db: RevokedTokenRepository.is_revoked(db, "0" * 32),
+        ),
+        (
+            "tokens.revoked_since",
+            lambda db: RevokedTokenRepository.revoked_since(
+                db, utcnow() - timedelta(minutes=1)
+            ),
+        ),
+        (
+            "digests.next_user_bound",
+            lambda db: DigestRepository(db).next_user_bound(0, 1000),
+        ),
+        (
+            "digests.birthdays",
+            lambda db: collect(
+                DigestRepository(db).upcoming_birthdays(
+                    user.id - 1, user.id, date.today(), 7
+                )
+            ),
+        ),
+        (
+            "outbox.claim_batch",
+            lambda db: OutboxRepository.claim_batch(
+                db, 50, timedelta(minutes=5), settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+            ),
+        ),
+    ]
+
+
+def plan_relations(plan) -> list[tuple[str, str]]:
+    """``(node type, relation)`` for every table node of a Postgres plan."""
+    nodes = [json.loads(plan[0][0]) if isinstance(plan[0][0], str) else plan[0][0]]
+    nodes = [entry["Plan"] for entry in nodes[0]]
+    relations = []
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            relations.append((node["Node Type"], node["Relation Name"]))
+        nodes.extend(node.get("Plans", []))
+    return relations
+
+
+def full_scans(dialect: str, plan) -> list[str]:
+    """Tables read by a sequential scan according to an EXPLAIN result."""
+    if dialect == "postgresql":
+        # Partitions of contacts are named contacts_p<n>
+        return [
+            PARTITION.sub("", relation)
+            for node_type, relation in plan_relations(plan)
+            if node_type == "Seq Scan"
+        ]
+
+    # SQLite: "SCAN <table> ..." reads every row; "SEARCH" uses an index.
+    # Virtual (FTS) tables answer MATCH from their own index.
+    return [
+        detail.split()[1]
+        for *_, detail in plan
+        if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail
+    ]
+
+
+def unpruned(dialect: str, plan) -> bool:
+    """Whether a statement reads more than one partition of contacts."""
+    if dialect != "postgresql":
+        return False
+    partitions = {
+        relation for _, relation in plan_relations(plan) if PARTITION.search(relation)
+    }
+    return len(partitions) > 1
+
+
+async def audit(min_rows: int) -> list[tuple[str, str, list[str]]]:
+    engine = sessionmanager.engine
+    dialect = engine.dialect.name
+    explain = (
+        "EXPLAIN (FORMAT JSON) " if dialect == "postgresql" else "EXPLAIN QUERY PLAN "
+    )
+
+    async with engine.connect() as conn:
+        row_counts = {
+            name: (await conn.execute(select(func.count()).select_from(table))).scalar()
+            for name, table in Base.metadata.tables.items()
+        }
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+
+        async with sessionmanager.session() as db:
+            user_row = await UserRepository.get_by_email(db, "audit0@example.com")
+            user = UserResponse.model_validate(user_row)
+            contact_id = (
+                await db.execute(
+                    select(Contact.id).where(Contact.user_id == user.id).limit(1)
+                )
+            ).scalar_one()
+
+    captured: list[tuple[str, str, object]] = []
+    label = None
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if label and statement.lstrip().upper().startswith(
+            ("SELECT", "UPDATE", "DELETE", "WITH")
+        ):
+            captured.append((label, statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        for label, run in workload(user, contact_id):
+            async with sessionmanager.session() as db:
+                await run(db)
+        label = None
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    report = []
+    async with engine.connect() as conn:
+        for query_label, statement, parameters in captured:
+            plan = (await conn.exec_driver_sql(explain + statement, parameters)).all()
+            problems = [
+                f"SEQ SCAN on {table}"
+                for table in full_scans(dialect, plan)
+                if row_counts.get(table, 0) >= min_rows
+            ]
+            if unpruned(dialect, plan):
+                problems.append("NOT PRUNED")
+            report.append((query_label, " ".join(statement.split()), problems))
+        await conn.rollback()
+    return report
+
+
+async def run(users: int, contacts: int, min_rows: int, force: bool) -> int:
+    sessionmanager.init()
+    try:
+        async with sessionmanager.session() as db:
+            existing = (await db.execute(select(func.count(User.id)))).scalar()
+        if existing and not force:
+            print(
+                "Refusing to seed a database that already has users; "
+                "use a scratch database or pass --force",
+                file=sys.stderr,
+            )
+            return 2
+
+        await seed(users, contacts)
+        report = await audit(min_rows)
+    finally:
+        await sessionmanager.close()
+
+    failures = 0
+    for label, statement, problems in report:
+        status = ", ".join(problems) or "ok"
+        failures += bool(problems)
+        print(f"{label:<26}{status:<30}{statement[:100]}")
+    print(f"\n{len(report)} statements, {failures} with problems")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=5000, help="per user")
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=1000,
+        help="ignore full scans of tables smaller than this",
+    )
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.users, args.contacts, args.min_rows, args.force)))
+
+
+if __name__ == "__main__":
+    main()
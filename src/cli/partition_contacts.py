@@ -0,0 +1,50 @@
+"""Change how many hash partitions the contacts table has, online.
+
+    python -m src.cli.partition_contacts [--partitions N] [--batch-size 10000]
+
+Defaults to CONTACTS_PARTITIONS; 0 turns contacts back into a plain table.
+Postgres only. Reads and writes keep working during the copy; see
+src/database/partitioning.py for how.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.database.partitioning import partition_count, repartition_contacts
+
+
+async def run(partitions: int, batch_size: int) -> int:
+    sessionmanager.init()
+    try:
+        engine = sessionmanager.engine
+        if engine.dialect.name != "postgresql":
+            print("Partitioning is only supported on PostgreSQL", file=sys.stderr)
+            return 2
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            current = await conn.run_sync(partition_count)
+            if current == partitions:
+                print(f"contacts already has {partitions} partitions")
+                return 0
+            copied = await conn.run_sync(repartition_contacts, partitions, batch_size)
+    finally:
+        await sessionmanager.close()
+    print(f"contacts: {current} -> {partitions} partitions, {copied} rows copied")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--partitions", type=int, default=settings.CONTACTS_PARTITIONS)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args.partitions, args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
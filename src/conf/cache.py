@@ -0,0 +1,18 @@
+from src.conf.config import settings
+from src.utils.cache import GenerationalCache, create_cache
+
+principal_cache = create_cache(
+    prefix="principal",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    redis_url=settings.REDIS_URL,
+)
+
+contact_cache = GenerationalCache(
+    create_cache(
+        prefix="contacts",
+        maxsize=settings.CONTACT_CACHE_SIZE,
+        ttl=settings.CONTACT_CACHE_TTL,
+        redis_url=settings.REDIS_URL,
+    )
+)
@@ -1,6 +1,6 @@
+from datetime import date
 from pathlib import Path
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from pydantic import EmailStr
+from fastapi_mail import ConnectionConfig
 from src.conf.config import settings
 
 conf = ConnectionConfig(
@@ -10,20 +10,33 @@ conf = ConnectionConfig(
     MAIL_PORT=settings.MAIL_PORT,
     MAIL_SERVER=settings.MAIL_SERVER,
     MAIL_FROM_NAME="Contact App",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
+    MAIL_STARTTLS=settings.MAIL_STARTTLS,
+    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+    USE_CREDENTIALS=settings.MAIL_USE_CREDENTIALS,
     VALIDATE_CERTS=True,
     TEMPLATE_FOLDER=Path(__file__).parent.parent / "templates",  
 )
 
 
-async def send_verification_email(email: EmailStr, token: str):
-    message = MessageSchema(
-        subject="Verify your email",
-        recipients=[email],
-        template_body={"token": token},
-        subtype=MessageType.html,
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message, template_name="verify_email.html")
+def verification_email(email: str, token: str) -> dict:
+    """Outbox message asking ``email`` to confirm its address."""
+    return {
+        "dedup_key": f"verify:{email}",
+        "recipient": email,
+        "subject": "Verify your email",
+        "template_name": "verify_email.html",
+        "template_body": {"token": token},
+    }
+
+
+def birthday_digest_email(
+    user_id: int, email: str, day: date, birthdays: list[dict], more: int
+) -> dict:
+    """Outbox message listing ``email``'s upcoming birthdays as of ``day``."""
+    return {
+        "dedup_key": f"birthday-digest:{user_id}:{day.isoformat()}",
+        "recipient": email,
+        "subject": "Upcoming birthdays",
+        "template_name": "birthday_digest.html",
+        "template_body": {"birthdays": birthdays, "more": more},
+    }
@@ -0,0 +1,8 @@
+from src.conf.config import settings
+from src.utils.events import create_event_bus
+
+contact_events = create_event_bus(
+    settings.CONTACT_EVENTS_BUS,
+    settings.DB_URL,
+    settings.CONTACT_EVENTS_QUEUE_SIZE,
+)
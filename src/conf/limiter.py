@@ -0,0 +1,62 @@
+from fastapi import Request
+from slowapi import Limiter
+from slowapi.middleware import SlowAPIASGIMiddleware, _ASGIMiddlewareResponder
+from slowapi.util import get_remote_address
+from starlette.types import Message, Receive, Scope, Send
+
+from src.conf.config import settings
+from src.services.tokens import decode_token
+from src.utils.tokens import TokenError
+
+
+def ip_key(request: Request) -> str:
+    return f"ip:{get_remote_address(request)}"
+
+
+def user_or_ip_key(request: Request) -> str:
+    """Limit authenticated callers per user and anonymous callers per IP."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        # Verified claims are cached, so this is a dict lookup after the first call
+        try:
+            return f"user:{decode_token(token, 'access')['sub']}"
+        except TokenError:
+            pass
+    return ip_key(request)
+
+
+# One limiter for the whole app. Counters live in RATE_LIMIT_STORAGE_URI, so
+# with "redis://..." every worker shares them; "memory://" keeps a per-process
+# sliding window counter (two integers per key) whose expired keys are evicted
+# in the background. Counters are kept per route ("endpoint" key style), not
+# per concrete URL.
+limiter = Limiter(
+    key_func=user_or_ip_key,
+    key_style="endpoint",
+    default_limits=[settings.RATE_LIMIT_DEFAULT],
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    key_prefix="contacts-api",
+)
+
+
+class _Responder(_ASGIMiddlewareResponder):
+    _started = False
+
+    async def send_wrapper(self, message: Message) -> None:
+        # slowapi re-sends http.response.start before every body chunk, which
+        # breaks streaming responses; only the first chunk needs it.
+        if message["type"] == "http.response.body" and self._started:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.body":
+            self._started = True
+        await super().send_wrapper(message)
+
+
+class RateLimitMiddleware(SlowAPIASGIMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        await _Responder(self.app)(scope, receive, send)
@@ -1,24 +1,234 @@
 import contextlib
+import hashlib
+import itertools
 import logging
-from sqlalchemy.exc import SQLAlchemyError
+import time
+import uuid
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from src.conf.config import settings
+from src.services.metrics import instrument_engine
+from src.utils.cache import TTLCache
 
 logger = logging.getLogger("uvicorn.error")
 
 
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - start)
+
+
+def engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if settings.DB_NULL_POOL:
+        options["poolclass"] = NullPool
+    elif not (
+        parsed.get_backend_name() == "sqlite"
+        and parsed.database in (None, "", ":memory:")
+    ):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if parsed.get_driver_name() == "asyncpg":
+        connect_args = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+        if settings.DB_NULL_POOL:
+            # PgBouncer transaction pooling: no server-side statement may be
+            # reused across transactions, and names must not collide
+            # between the clients sharing a server connection
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=_unique_statement_name,
+            )
+        options["connect_args"] = connect_args
+    return options
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_commit(session):
+    session.info["committed"] = True
+
+
+def _create_engine(url: str, metrics: PoolMetrics, name: str) -> AsyncEngine:
+    engine = create_async_engine(url, **engine_options(url))
+    instrument_engine(engine, name)
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics = metrics
+    return engine
+
+
+def _pool_stats(engine: AsyncEngine, metrics: PoolMetrics) -> dict:
+    pool = engine.sync_engine.pool
+    stats = {
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_total": metrics.wait_seconds_total,
+        "wait_seconds_max": metrics.wait_seconds_max,
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            saturation=pool.checkedout() / capacity if capacity else 0.0,
+        )
+    return stats
+
+
+class Replica:
+    def __init__(self, url: str, name: str):
+        self.url = url
+        self.metrics = PoolMetrics()
+        self.engine = _create_engine(url, self.metrics, name)
+        self.session_maker = async_sessionmaker(
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            bind=self.engine,
+        )
+        self.active = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.unhealthy_until <= time.monotonic()
+
+
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine = create_async_engine(url)
-        self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
+    def __init__(self, url: str, replica_urls: Optional[list[str]] = None):
+        self.url = url
+        self.replica_urls = replica_urls or []
+        self._engine: Optional[AsyncEngine] = None
+        self._session_maker: Optional[async_sessionmaker] = None
+        self._replicas: list[Replica] = []
+        self._round_robin = itertools.count()
+        # Clients that wrote recently read from the primary for a short while.
+        self._sticky = TTLCache(maxsize=100_000, ttl=settings.DB_REPLICA_STICKY_SECONDS)
+        self.pool_metrics = PoolMetrics()
+
+    def init(self):
+        if self._engine is not None:
+            return
+        self._engine = _create_engine(self.url, self.pool_metrics, "primary")
+        self._session_maker = async_sessionmaker(
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            bind=self._engine,
         )
+        self._replicas = [
+            Replica(url, f"replica{index}")
+            for index, url in enumerate(self.replica_urls)
+        ]
+
+    async def close(self):
+        if self._engine is None:
+            return
+        for replica in self._replicas:
+            await replica.engine.dispose()
+        await self._engine.dispose()
+        self._engine = None
+        self._session_maker = None
+        self._replicas = []
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            raise Exception("Database engine is not initialized")
+        return self._engine
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.engine] + [replica.engine for replica in self._replicas]
+
+    def pool_stats(self) -> dict:
+        stats = _pool_stats(self.engine, self.pool_metrics)
+        stats["replicas"] = [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "active": replica.active,
+                **_pool_stats(replica.engine, replica.metrics),
+            }
+            for replica in self._replicas
+        ]
+        return stats
+
+    def mark_write(self, sticky_key: str):
+        self._sticky.set(sticky_key, True)
+
+    def _candidates(self) -> list[Replica]:
+        healthy = [replica for replica in self._replicas if replica.healthy]
+        if settings.DB_REPLICA_STRATEGY == "least_connections":
+            return sorted(healthy, key=lambda replica: replica.active)
+        if not healthy:
+            return []
+        offset = next(self._round_robin) % len(healthy)
+        return healthy[offset:] + healthy[:offset]
+
+    async def _connect_replica(self):
+        for replica in self._candidates():
+            session = replica.session_maker()
+            try:
+                await session.connection()
+            except (SQLAlchemyError, OSError) as e:
+                logger.warning(f"Read replica {replica.engine.url} is unavailable: {e}")
+                replica.unhealthy_until = (
+                    time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+                )
+                await session.close()
+                continue
+            return replica, session
+        return None, None
 
     @contextlib.asynccontextmanager
-    async def session(self):
-        if self._session_maker is None:
-            raise Exception("Database session is not initialized")
-        session = self._session_maker()
+    async def _scope(self, session):
         try:
             yield session
         except SQLAlchemyError as e:
@@ -32,10 +242,50 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    @contextlib.asynccontextmanager
+    async def session(self):
+        if self._session_maker is None:
+            raise Exception("Database session is not initialized")
+        async with self._scope(self._session_maker()) as session:
+            yield session
+
+    @contextlib.asynccontextmanager
+    async def read_session(self, sticky_key: Optional[str] = None):
+        """Session on a healthy replica, or on the primary as a fallback."""
+        replica = session = None
+        if self._replicas and not (sticky_key and self._sticky.get(sticky_key)):
+            replica, session = await self._connect_replica()
+
+        if replica is None:
+            async with self.session() as session:
+                yield session
+            return
+
+        replica.active += 1
+        try:
+            async with self._scope(session) as session:
+                yield session
+        finally:
+            replica.active -= 1
+
+
+sessionmanager = DatabaseSessionManager(settings.DB_URL, settings.DB_REPLICA_URLS)
+
 
-sessionmanager = DatabaseSessionManager(settings.DB_URL)
+def client_key(request: Request) -> str:
+    credentials = request.headers.get("Authorization")
+    if credentials:
+        return hashlib.blake2b(credentials.encode(), digest_size=16).hexdigest()
+    return request.client.host if request.client else "anonymous"
 
 
-async def get_db():
+async def get_db(request: Request):
     async with sessionmanager.session() as session:
         yield session
+        if session.info.get("committed"):
+            sessionmanager.mark_write(client_key(request))
+
+
+async def get_read_db(request: Request):
+    async with sessionmanager.read_session(client_key(request)) as session:
+        yield session
@@ -0,0 +1,241 @@
+"""Online rebuild of ``contacts`` as a hash-partitioned (or plain) table.
+
+Postgres only. Used by migration c6d1e9f3a7b2 and by
+``python -m src.cli.partition_contacts`` to change the partition count.
+
+The rebuild never holds a lock on ``contacts`` for longer than the final
+swap:
+
+1. ``contacts_new`` is created with the same columns, indexes and foreign
+   keys, hash-partitioned on ``user_id`` unless ``partitions`` is 0.
+2. A trigger mirrors every write to ``contacts`` into ``contacts_new``.
+3. Rows are copied in ``(user_id, id)`` order, one committed batch at a
+   time. ``FOR SHARE`` makes a concurrent write wait for the batch holding
+   its row, so the mirror always applies on top of the copy.
+4. In one short transaction the old table is dropped and the new one is
+   renamed into place.
+
+The connection must be in autocommit mode so every batch commits.
+"""
+
+import logging
+import re
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("partitioning")
+
+TABLE = "contacts"
+NEW = "contacts_new"
+
+
+def partition_count(conn: Connection) -> int:
+    """Number of hash partitions of ``contacts``; 0 for a plain table."""
+    return conn.execute(
+        text(
+            "SELECT count(*) FROM pg_inherits "
+            "WHERE inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": TABLE},
+    ).scalar_one()
+
+
+def _columns(conn: Connection) -> list[str]:
+    rows = conn.execute(
+        text(
+            "SELECT attname FROM pg_attribute "
+            "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 "
+            "AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+        ),
+        {"table": TABLE},
+    )
+    return [name for (name,) in rows]
+
+
+def _indexes(conn: Connection) -> list[tuple[str, str]]:
+    """``(name, definition)`` of every index except the primary key."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary"
+        ),
+        {"table": TABLE},
+    )
+    return rows.all()
+
+
+def _foreign_keys(conn: Connection) -> list[tuple[str, str]]:
+    rows = conn.execute(
+        text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": TABLE},
+    )
+    return rows.all()
+
+
+def _create_new_table(conn: Connection, partitions: int):
+    partition_by = " PARTITION BY HASH (user_id)" if partitions else ""
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {NEW}")
+    conn.exec_driver_sql(
+        f"CREATE TABLE {NEW} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING GENERATED"
+        f" INCLUDING CONSTRAINTS){partition_by}"
+    )
+    for remainder in range(partitions):
+        conn.exec_driver_sql(
+            f"CREATE TABLE {NEW}_p{remainder} PARTITION OF {NEW} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+
+    # A partitioned table's keys must contain the partition key. Leading
+    # with id keeps the primary key useful for lookups by id alone.
+    primary_key = "(id, user_id)" if partitions else "(id)"
+    conn.exec_driver_sql(
+        f"ALTER TABLE {NEW} ADD CONSTRAINT {NEW}_pkey PRIMARY KEY {primary_key}"
+    )
+    for name, definition in _foreign_keys(conn):
+        conn.exec_driver_sql(
+            f"ALTER TABLE {NEW} ADD CONSTRAINT {name}_new {definition}"
+        )
+    # Built up front: on the empty table this is instant, and a later build
+    # would block the mirror trigger, and with it every write to contacts.
+    for name, definition in _indexes(conn):
+        definition = definition.replace(f"INDEX {name} ON", f"INDEX {name}_new ON", 1)
+        definition = re.sub(
+            rf" ON (ONLY )?(public\.)?{TABLE} ", f" ON {NEW} ", definition, count=1
+        )
+        conn.exec_driver_sql(definition)
+
+
+def _install_mirror(conn: Connection, columns: list[str]):
+    names = ", ".join(columns)
+    values = ", ".join(f"NEW.{column}" for column in columns)
+    conn.exec_driver_sql(f"""
+        CREATE OR REPLACE FUNCTION {NEW}_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM {NEW} WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {NEW} ({names}) VALUES ({values});
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {NEW}_mirror AFTER INSERT OR UPDATE OR DELETE ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {NEW}_mirror()"
+    )
+
+
+def _copy(conn: Connection, columns: list[str], batch_size: int) -> int:
+    names = ", ".join(columns)
+    statement = text(f"""
+        WITH batch AS (
+            SELECT {names} FROM {TABLE}
+            WHERE (user_id, id) > (:user_id, :id)
+            ORDER BY user_id, id
+            LIMIT :batch_size
+            FOR SHARE
+        ), copied AS (
+            INSERT INTO {NEW} ({names}) SELECT {names} FROM batch
+            ON CONFLICT DO NOTHING
+        )
+        SELECT user_id, id, (SELECT count(*) FROM batch) FROM batch
+        ORDER BY user_id DESC, id DESC
+        LIMIT 1
+        """)
+    position = {"user_id": -1, "id": -1, "batch_size": batch_size}
+    copied = 0
+    while True:
+        row = conn.execute(statement, position).first()
+        if row is None:
+            return copied
+        position.update(user_id=row[0], id=row[1])
+        copied += row[2]
+        logger.info(f"Copied {copied} contacts")
+
+
+def _swap(conn: Connection, index_names: list[str], fk_names: list[str]):
+    # Run after contacts_new has taken the name contacts
+    renames = [f"ALTER TABLE {TABLE} RENAME CONSTRAINT {NEW}_pkey TO {TABLE}_pkey;"]
+    renames += [
+        f"ALTER TABLE {TABLE} RENAME CONSTRAINT {name}_new TO {name};"
+        for name in fk_names
+    ]
+    renames += [f"ALTER INDEX {name}_new RENAME TO {name};" for name in index_names]
+    # A DO block runs as one statement, so the swap is atomic even though
+    # the connection is in autocommit mode.
+    conn.exec_driver_sql(f"""
+        DO $$
+        DECLARE
+            sequence text := pg_get_serial_sequence('{TABLE}', 'id');
+            partition record;
+        BEGIN
+            SET LOCAL lock_timeout = '5s';
+            LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE;
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY {NEW}.id', sequence);
+            DROP TABLE {TABLE};
+            ALTER TABLE {NEW} RENAME TO {TABLE};
+            {" ".join(renames)}
+            FOR partition IN
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = '{TABLE}'::regclass
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE %I RENAME TO %I',
+                    partition.relname,
+                    replace(partition.relname, '{NEW}_', '{TABLE}_')
+                );
+            END LOOP;
+            DROP FUNCTION {NEW}_mirror();
+        END
+        $$
+        """)
+
+
+def repartition_contacts(
+    conn: Connection, partitions: int, batch_size: int = 10_000, attempts: int = 5
+) -> int:
+    """Rebuild ``contacts`` with ``partitions`` hash partitions (0 = plain).
+
+    Returns the number of rows copied.
+    """
+    if partitions < 0:
+        raise ValueError("partitions must be >= 0")
+
+    columns = _columns(conn)
+    indexes = _indexes(conn)
+    foreign_keys = _foreign_keys(conn)
+    _create_new_table(conn, partitions)
+    _install_mirror(conn, columns)
+    try:
+        copied = _copy(conn, columns, batch_size)
+        conn.exec_driver_sql(f"ANALYZE {NEW}")
+        for attempt in range(1, attempts + 1):
+            try:
+                _swap(
+                    conn,
+                    [name for name, _ in indexes],
+                    [name for name, _ in foreign_keys],
+                )
+                break
+            except DBAPIError as e:
+                # lock_timeout: long-running queries still hold contacts
+                if attempt == attempts or "lock timeout" not in str(e):
+                    raise
+                logger.warning(f"Swap attempt {attempt} timed out, retrying")
+                time.sleep(attempt)
+    except BaseException:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {NEW}_mirror ON {TABLE}")
+        conn.exec_driver_sql(f"DROP FUNCTION IF EXISTS {NEW}_mirror()")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {NEW}")
+        raise
+    return copied
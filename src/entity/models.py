@@ -1,15 +1,29 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import (
+    DDL,
+    event,
+    Index,
+    JSON,
     String,
+    Date,
     DateTime,
     func,
     Integer,
     ForeignKey,
     Boolean,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    mapped_column,
+    relationship,
+    validates,
+)
+
+from src.utils.birthdays import birth_mmdd
+from src.utils.phones import to_e164
 
 
 class Base(DeclarativeBase):
@@ -29,21 +43,47 @@ class User(Base):
     avatar_url: Mapped[Optional[str]] = mapped_column(
         String(255), nullable=True
     )  
+    # {size: url} for every resized rendition; avatar_url is the largest one
+    avatars: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Bumped on every write to the user's contacts; drives list ETags
+    contacts_version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
     
     contacts: Mapped[list["Contact"]] = relationship("Contact", back_populates="user")
 
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index(
+            "ix_contacts_user_id_last_name_first_name",
+            "user_id",
+            "last_name",
+            "first_name",
+        ),
+        Index("ix_contacts_user_id_birth_mmdd", "user_id", "birth_mmdd"),
+        Index("ix_contacts_user_id_phone_e164", "user_id", "phone_e164"),
+        # Delta sync walks a user's contacts in (updated_at, id) order
+        Index("ix_contacts_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        # Emails are unique per owner, not across all users
+        Index("uq_contacts_user_id_email", "user_id", "email", unique=True),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    email: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    email: Mapped[str] = mapped_column(String(100), nullable=False)
     phone_number: Mapped[str] = mapped_column(String(20), nullable=False)
+    # phone_number in E.164 form for lookups; None if it does not parse
+    phone_e164: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
     birth_date: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False
     )
+    # month * 100 + day, kept in sync with birth_date for the birthdays index
+    birth_mmdd: Mapped[int] = mapped_column(Integer, nullable=False)
     additional_info: Mapped[str] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now()
@@ -54,3 +94,153 @@ class Contact(Base):
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped["User"] = relationship("User", back_populates="contacts")
+
+    @validates("birth_date")
+    def _sync_birth_mmdd(self, key, value):
+        self.birth_mmdd = birth_mmdd(value)
+        return value
+
+    @validates("phone_number")
+    def _sync_phone_e164(self, key, value):
+        self.phone_e164 = to_e164(value)
+        return value
+
+
+class ContactTombstone(Base):
+    """A deleted contact, kept so delta sync can report the deletion."""
+
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        Index(
+            "ix_contact_tombstones_user_id_deleted_at_contact_id",
+            "user_id",
+            "deleted_at",
+            "contact_id",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    contact_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Same clock as Contact.updated_at, so both sort on one timeline
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False
+    )
+
+
+class EmailOutbox(Base):
+    """Outgoing email, written in the same transaction as the change that
+    caused it and delivered by ``python -m src.workers.email_outbox``."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    dedup_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    recipient: Mapped[str] = mapped_column(String(100), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    template_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    template_body: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # pending -> sending -> sent, or failed once attempts are exhausted
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now()
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class DigestRun(Base):
+    """Progress of one day's digest run; resumed from ``last_user_id``."""
+
+    __tablename__ = "digest_runs"
+
+    kind: Mapped[str] = mapped_column(String(50), primary_key=True)
+    run_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    # Users up to this id have been processed
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    digests: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Rows are useless once the token has expired and are purged then
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    revoked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False, index=True
+    )
+
+
+# Full-text search support lives outside the mapped columns: Postgres keeps a
+# generated tsvector column with a GIN index, SQLite an external-content FTS5
+# table kept in sync by triggers. See src/repository/search.py.
+CONTACT_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE contacts ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector(
+                'simple',
+                coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' '
+                || regexp_replace(coalesce(email, ''), '[^[:alnum:]]+', ' ', 'g')
+            )
+        ) STORED
+        """,
+        "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE contacts_fts USING fts5(
+            first_name, last_name, email,
+            content='contacts', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 0'
+        )
+        """,
+        """
+        CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+        """
+        CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        END
+        """,
+        """
+        CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+            INSERT INTO contacts_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in CONTACT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Contact.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
@@ -1,28 +1,194 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_, and_
+from sqlalchemy import (
+    String,
+    bindparam,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 
-from src.entity.models import Contact
-from src.schemas.contacts import ContactCreate
+from src.conf.config import settings
+from src.conf.events import contact_events
+from src.entity.models import Contact, ContactTombstone, User
+from src.repository.outbox import utcnow
+from src.repository.search import get_search_engine, tokenize
+from src.schemas.contacts import ContactCreate, ContactResponse
 from src.schemas.users import UserResponse
+from src.utils.birthdays import FULL_YEAR, birth_mmdd, mmdd_ranges, next_birthday
+from src.utils.phones import to_e164
+
+BATCH_STATUS = {"create": 201, "update": 200, "delete": 204}
+
+# Change kinds in delta sync order: a deletion sorts before a write stamped
+# with the same time and id (SQLite may reuse the id of a deleted row)
+DELETED, WRITTEN = 0, 1
+
+UPSERT_COLUMNS = (
+    "first_name",
+    "last_name",
+    "phone_number",
+    "phone_e164",
+    "birth_date",
+    "birth_mmdd",
+    "additional_info",
+)
+
+
+# List reads select plain columns and return dicts: no identity map, no
+# attribute instrumentation, and the rows go straight to the JSON encoder.
+CONTACT_COLUMNS = [getattr(Contact, name) for name in ContactResponse.model_fields]
+
+
+def contact_values(data: ContactCreate, user_id: int) -> dict:
+    values = data.model_dump()
+    values.update(
+        user_id=user_id,
+        birth_mmdd=birth_mmdd(data.birth_date),
+        phone_e164=to_e164(data.phone_number),
+    )
+    return values
+
 
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
+
+# Every statement on contacts filters on user_id: contacts may be
+# hash-partitioned by it (CONTACTS_PARTITIONS), and only then can Postgres
+# prune the statement to one partition. src.cli.audit_indexes checks this.
 class ContactRepository:
     def __init__(self, session: AsyncSession):
         self.db = session
 
+    async def _bump_version(self, user_id: int):
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(contacts_version=User.contacts_version + 1)
+        )
+
+    async def _record_tombstones(self, user_id: int, contact_ids: list[int]):
+        await self.db.execute(
+            insert(ContactTombstone),
+            [{"user_id": user_id, "contact_id": id_} for id_ in contact_ids],
+        )
+        cutoff = utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        await self.db.execute(
+            delete(ContactTombstone).where(
+                ContactTombstone.user_id == user_id,
+                ContactTombstone.deleted_at < cutoff,
+            )
+        )
+
+    async def get_version(self, user: UserResponse) -> int:
+        result = await self.db.execute(
+            select(User.contacts_version).where(User.id == user.id)
+        )
+        return result.scalar_one_or_none() or 0
+
     async def create(self, contact: Contact):
+        # Server-side defaults come back through INSERT ... RETURNING
+        # (eager_defaults), so no refresh is needed.
         self.db.add(contact)
+        await self.db.flush()
+        await contact_events.publish(self.db, contact.user_id, "create", [contact.id])
+        await self._bump_version(contact.user_id)
         await self.db.commit()
-        await self.db.refresh(contact)
         return contact
 
-    async def get_all(self, user: UserResponse):
+    def _ordered(self, user: UserResponse, order: str, cursor: Optional[list] = None):
+        stmt = select(*CONTACT_COLUMNS).where(Contact.user_id == user.id)
+        if order == "name":
+            # Follows ix_contacts_user_id_last_name_first_name; id breaks ties
+            key = (Contact.last_name, Contact.first_name, Contact.id)
+            if cursor:
+                stmt = stmt.where(tuple_(*key) > tuple_(*cursor))
+            return stmt.order_by(*key)
+
+        if cursor:
+            (last_id,) = cursor
+            stmt = stmt.where(Contact.id > last_id)
+        return stmt.order_by(Contact.id)
+
+    async def get_page(
+        self,
+        user: UserResponse,
+        limit: int,
+        cursor: Optional[list] = None,
+        order: str = "id",
+    ):
+        stmt = self._ordered(user, order, cursor).limit(limit + 1)
+        result = await self.db.execute(stmt)
+        contacts = [dict(row) for row in result.mappings()]
+
+        next_cursor = None
+        if len(contacts) > limit:
+            contacts = contacts[:limit]
+            last = contacts[-1]
+            next_cursor = (
+                [last["last_name"], last["first_name"], last["id"]]
+                if order == "name"
+                else [last["id"]]
+            )
+        return contacts, next_cursor
+
+    async def stream_all(self, user: UserResponse, order: str = "id", chunk_size=500):
+        stmt = self._ordered(user, order).execution_options(yield_per=chunk_size)
+        result = await self.db.stream(stmt)
+        async for row in result.mappings():
+            yield dict(row)
+
+    def _insert(self):
+        if self.db.bind.dialect.name == "postgresql":
+            return postgresql.insert(Contact)
+        return sqlite.insert(Contact)
+
+    async def insert_many(self, rows: list[dict], user: UserResponse, upsert: bool):
+        """Insert a batch in one statement; return ``(inserted, updated)`` emails."""
+        emails = [row["email"] for row in rows]
         result = await self.db.execute(
-            select(Contact).where(Contact.user_id == user.id)
+            select(Contact.email).where(
+                Contact.email.in_(emails), Contact.user_id == user.id
+            )
         )
-        return result.scalars().all()
+        owned = set(result.scalars().all())
+
+        stmt = self._insert().values(rows)
+        if upsert:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Contact.user_id, Contact.email],
+                set_={
+                    **{name: stmt.excluded[name] for name in UPSERT_COLUMNS},
+                    "updated_at": func.now(),
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=[Contact.user_id, Contact.email]
+            )
+
+        result = await self.db.execute(stmt.returning(Contact.id, Contact.email))
+        written = dict(result.all())
+        if written:
+            created = [id_ for id_, email in written.items() if email not in owned]
+            updated = [id_ for id_, email in written.items() if email in owned]
+            await contact_events.publish(self.db, user.id, "create", created)
+            await contact_events.publish(self.db, user.id, "update", updated)
+            await self._bump_version(user.id)
+        await self.db.commit()
+        emails = set(written.values())
+        return emails - owned, emails & owned
 
     async def get_by_id(self, contact_id: int, user: UserResponse):
         result = await self.db.execute(
@@ -33,45 +199,277 @@ class ContactRepository:
     async def update(
         self, contact_id: int, updated_data: ContactCreate, user: UserResponse
     ):
-        contact = await self.get_by_id(contact_id, user)
-        if not contact:
+        result = await self.db.execute(
+            update(Contact)
+            .where(Contact.id == contact_id, Contact.user_id == user.id)
+            .values(**contact_values(updated_data, user.id))
+            .returning(Contact)
+        )
+        contact = result.scalar_one_or_none()
+        if contact is None:
             return None
 
-        for key, value in updated_data.dict().items():
-            setattr(contact, key, value)
-
+        await contact_events.publish(self.db, user.id, "update", [contact.id])
+        await self._bump_version(user.id)
         await self.db.commit()
-        await self.db.refresh(contact)
         return contact
 
     async def delete(self, contact_id: int, user: UserResponse):
-        contact = await self.get_by_id(contact_id, user)
-        if not contact:
+        result = await self.db.execute(
+            delete(Contact)
+            .where(Contact.id == contact_id, Contact.user_id == user.id)
+            .returning(Contact.id)
+        )
+        deleted_id = result.scalar_one_or_none()
+        if deleted_id is None:
             return None
 
-        await self.db.delete(contact)
+        await self._record_tombstones(user.id, [deleted_id])
+        await contact_events.publish(self.db, user.id, "delete", [deleted_id])
+        await self._bump_version(user.id)
         await self.db.commit()
-        return contact
+        return deleted_id
 
-    async def search_contacts(self, query: str, user: UserResponse):
-        stmt = select(Contact).where(
-            Contact.user_id == user.id,
-            or_(
-                Contact.first_name.ilike(f"%{query}%"),
-                Contact.last_name.ilike(f"%{query}%"),
-                Contact.email.ilike(f"%{query}%"),
-            ),
+    def _check_batch(self, operations: list, current: dict[int, str]) -> list[dict]:
+        """Validate operations in order against the owned rows in ``current``.
+
+        Returns one result dict per operation; accepted ones carry their
+        success status. Later operations see the effect of earlier ones, so
+        deleting a contact frees its email for a create in the same batch.
+        """
+        taken = {email: contact_id for contact_id, email in current.items()}
+        touched: set[int] = set()
+        results = []
+        for index, op in enumerate(operations):
+            entry = {"index": index, "op": op.op, "id": getattr(op, "id", None)}
+            results.append(entry)
+            if op.op != "create":
+                if op.id not in current:
+                    entry.update(status=404, error="Contact not found")
+                    continue
+                if op.id in touched:
+                    entry.update(
+                        status=409, error="Contact appears more than once in the batch"
+                    )
+                    continue
+            if op.op != "delete":
+                holder = taken.get(op.data.email)
+                if holder is not None and holder != entry["id"]:
+                    entry.update(
+                        status=409, error=f"Email {op.data.email} is already in use"
+                    )
+                    continue
+
+            if op.op != "create":
+                touched.add(op.id)
+                if taken.get(current[op.id]) == op.id:
+                    del taken[current[op.id]]
+            if op.op != "delete":
+                taken[op.data.email] = entry["id"] if op.op == "update" else -index - 1
+            entry["status"] = BATCH_STATUS[op.op]
+        return results
+
+    async def apply_batch(self, operations: list, user: UserResponse, atomic: bool):
+        """Apply create/update/delete operations in one transaction.
+
+        One SELECT checks ownership and email collisions, then deletes, updates
+        and inserts run as one statement each. Returns ``(results, committed)``.
+        """
+        ids = {op.id for op in operations if op.op != "create"}
+        emails = {op.data.email for op in operations if op.op != "delete"}
+        result = await self.db.execute(
+            select(Contact.id, Contact.email).where(
+                Contact.user_id == user.id,
+                or_(Contact.id.in_(ids), Contact.email.in_(emails)),
+            )
         )
-        result = await self.db.execute(stmt)
-        return result.scalars().all()
+        results = self._check_batch(operations, dict(result.all()))
+
+        if atomic and any(entry["status"] >= 400 for entry in results):
+            for entry in results:
+                if entry["status"] < 400:
+                    entry.update(
+                        status=424, error="Not applied: another operation failed"
+                    )
+            return results, False
+
+        accepted = [
+            (op, entry)
+            for op, entry in zip(operations, results)
+            if entry["status"] < 400
+        ]
+        if not accepted:
+            return results, False
+
+        deletes = [op.id for op, _ in accepted if op.op == "delete"]
+        updates = [op for op, _ in accepted if op.op == "update"]
+        creates = [(op, entry) for op, entry in accepted if op.op == "create"]
+        try:
+            if deletes:
+                result = await self.db.execute(
+                    delete(Contact)
+                    .where(Contact.user_id == user.id, Contact.id.in_(deletes))
+                    .returning(Contact.id)
+                )
+                deleted = list(result.scalars())
+                await self._record_tombstones(user.id, deleted)
+                await contact_events.publish(self.db, user.id, "delete", deleted)
+            if updates:
+                # Core executemany: rows are updated in request order
+                table = Contact.__table__
+                await self.db.execute(
+                    table.update().where(
+                        table.c.id == bindparam("contact_id"),
+                        table.c.user_id == user.id,
+                    ),
+                    [
+                        {"contact_id": op.id, **contact_values(op.data, user.id)}
+                        for op in updates
+                    ],
+                )
+                await contact_events.publish(
+                    self.db, user.id, "update", [op.id for op in updates]
+                )
+            if creates:
+                result = await self.db.execute(
+                    insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+                    [contact_values(op.data, user.id) for op, _ in creates],
+                )
+                for (_, entry), contact_id in zip(creates, result.scalars()):
+                    entry["id"] = contact_id
+                await contact_events.publish(
+                    self.db, user.id, "create", [entry["id"] for _, entry in creates]
+                )
+            await self._bump_version(user.id)
+            await self.db.commit()
+        except IntegrityError:
+            # A concurrent write took an email; nothing from this batch is kept
+            await self.db.rollback()
+            for _, entry in accepted:
+                entry.update(status=409, error="Conflicts with a concurrent change")
+            return results, False
+
+        written = [entry["id"] for op, entry in accepted if op.op != "delete"]
+        if written:
+            result = await self.db.execute(
+                select(*CONTACT_COLUMNS).where(
+                    Contact.user_id == user.id, Contact.id.in_(written)
+                )
+            )
+            rows = {row["id"]: dict(row) for row in result.mappings()}
+            for op, entry in accepted:
+                if op.op != "delete":
+                    entry["contact"] = rows.get(entry["id"])
+        return results, True
+
+    def _timestamp(self, value: datetime):
+        # SQLite keeps CURRENT_TIMESTAMP as "YYYY-MM-DD HH:MM:SS" text, while
+        # bound datetimes carry microseconds; compare in the stored format or
+        # rows from the bound's own second sort before it and are skipped.
+        if self.db.bind.dialect.name == "sqlite":
+            value = value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            return literal(value, String)
+        return value
+
+    async def current_time(self) -> datetime:
+        """The database clock, which stamps updated_at and deleted_at."""
+        return _utc((await self.db.execute(select(func.now()))).scalar_one())
+
+    async def get_changes(
+        self, user: UserResponse, limit: int, position: Optional[tuple] = None
+    ):
+        """Contacts written and deleted after ``position``, oldest first.
+
+        ``position`` is the ``(timestamp, id, kind)`` of the last change the
+        client has seen; with ``id`` None everything from ``timestamp`` on is
+        returned. Returns ``(changes, has_more)``, each change being
+        ``(timestamp, id, kind, contact)`` with ``contact`` None for deletions.
+        """
+        written = select(*CONTACT_COLUMNS).where(Contact.user_id == user.id)
+        deleted = select(
+            ContactTombstone.deleted_at, ContactTombstone.contact_id
+        ).where(ContactTombstone.user_id == user.id)
+        if position is not None:
+            stamp, last_id, kind = position
+            bound = self._timestamp(stamp)
+            if last_id is None:
+                written = written.where(Contact.updated_at >= bound)
+                deleted = deleted.where(ContactTombstone.deleted_at >= bound)
+            else:
+                key = tuple_(Contact.updated_at, Contact.id)
+                after = tuple_(bound, last_id)
+                written = written.where(
+                    key >= after if kind == DELETED else key > after
+                )
+                deleted = deleted.where(
+                    tuple_(ContactTombstone.deleted_at, ContactTombstone.contact_id)
+                    > after
+                )
+
+        # Follow ix_contacts_user_id_updated_at_id and the tombstone index;
+        # limit + 1 from each side is enough to fill and detect the next page
+        written = written.order_by(Contact.updated_at, Contact.id).limit(limit + 1)
+        deleted = deleted.order_by(
+            ContactTombstone.deleted_at, ContactTombstone.contact_id
+        ).limit(limit + 1)
+
+        changes = [
+            (_utc(row["updated_at"]), row["id"], WRITTEN, dict(row))
+            for row in (await self.db.execute(written)).mappings()
+        ]
+        changes.extend(
+            (_utc(deleted_at), contact_id, DELETED, None)
+            for deleted_at, contact_id in (await self.db.execute(deleted)).all()
+        )
+        changes.sort(key=lambda change: change[:3])
+        return changes[:limit], len(changes) > limit
+
+    async def get_by_phones(self, numbers: list[str], user: UserResponse):
+        """Map each E.164 number in ``numbers`` to the contacts that have it.
+
+        One IN probe of ix_contacts_user_id_phone_e164 covers the whole list.
+        """
+        result = await self.db.execute(
+            select(*CONTACT_COLUMNS, Contact.phone_e164)
+            .where(Contact.user_id == user.id, Contact.phone_e164.in_(numbers))
+            .order_by(Contact.id)
+        )
+        matches: dict[str, list[dict]] = {}
+        for row in result.mappings():
+            contact = dict(row)
+            matches.setdefault(contact.pop("phone_e164"), []).append(contact)
+        return matches
 
-    async def get_upcoming_birthdays(self, user: UserResponse):
-        today = datetime.today().date()
-        next_week = today + timedelta(days=7)
+    async def search_contacts(
+        self, query: str, user: UserResponse, limit: int = 50, offset: int = 0
+    ):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
 
-        stmt = select(Contact).where(
-            Contact.user_id == user.id,
-            and_(Contact.birth_date >= today, Contact.birth_date <= next_week),
+        engine = get_search_engine(self.db.bind.dialect.name)
+        stmt = engine.build(tokens, user.id, limit, offset).with_only_columns(
+            *CONTACT_COLUMNS, maintain_column_froms=True
         )
         result = await self.db.execute(stmt)
-        return result.scalars().all()
+        return [dict(row) for row in result.mappings()]
+
+    async def get_upcoming_birthdays(
+        self, user: UserResponse, days: int, today: Optional[date] = None
+    ):
+        today = today or date.today()
+        ranges = mmdd_ranges(today, days)
+
+        stmt = select(*CONTACT_COLUMNS).where(Contact.user_id == user.id)
+        if ranges != FULL_YEAR:
+            stmt = stmt.where(
+                or_(*(Contact.birth_mmdd.between(low, high) for low, high in ranges))
+            )
+        result = await self.db.execute(stmt)
+        return sorted(
+            (dict(row) for row in result.mappings()),
+            key=lambda contact: (
+                next_birthday(contact["birth_date"], today),
+                contact["id"],
+            ),
+        )
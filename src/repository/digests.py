@@ -0,0 +1,90 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.entity.models import Contact, DigestRun, User
+from src.utils.birthdays import FULL_YEAR, birth_mmdd, mmdd_ranges
+
+
+class DigestRepository:
+    def __init__(self, session: AsyncSession):
+        self.db = session
+
+    async def start_run(self, kind: str, day: date) -> DigestRun:
+        """The run for ``day``, created on first use."""
+        run = await self.db.get(DigestRun, (kind, day))
+        if run is not None:
+            return run
+        self.db.add(DigestRun(kind=kind, run_date=day))
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Another worker started the same run
+            await self.db.rollback()
+        return await self.db.get(DigestRun, (kind, day))
+
+    async def lock_run(self, kind: str, day: date) -> DigestRun:
+        # Concurrent workers take turns chunk by chunk instead of overlapping
+        result = await self.db.execute(
+            select(DigestRun)
+            .where(DigestRun.kind == kind, DigestRun.run_date == day)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one()
+
+    async def next_user_bound(self, after: int, count: int) -> Optional[int]:
+        """Id of the ``count``-th user after ``after``, or the last one."""
+        chunk = (
+            select(User.id)
+            .where(User.id > after)
+            .order_by(User.id)
+            .limit(count)
+            .subquery()
+        )
+        result = await self.db.execute(select(func.max(chunk.c.id)))
+        return result.scalar_one_or_none()
+
+    async def upcoming_birthdays(
+        self, after: int, upto: int, day: date, days: int, chunk_size: int = 1000
+    ):
+        """Stream verified users' contacts with a birthday in the window.
+
+        Covers owners with ``after < user_id <= upto`` in one statement,
+        ordered by owner and then by upcoming birthday.
+        """
+        ranges = mmdd_ranges(day, days)
+        stmt = (
+            select(
+                Contact.user_id,
+                User.email.label("owner_email"),
+                Contact.first_name,
+                Contact.last_name,
+                Contact.phone_number,
+                Contact.birth_date,
+            )
+            .join(User, User.id == Contact.user_id)
+            .where(
+                Contact.user_id > after,
+                Contact.user_id <= upto,
+                User.is_verified.is_(True),
+            )
+        )
+        if ranges != FULL_YEAR:
+            stmt = stmt.where(
+                or_(*(Contact.birth_mmdd.between(low, high) for low, high in ranges))
+            )
+        # Birthdays later in the year come first when the window wraps
+        stmt = stmt.order_by(
+            Contact.user_id,
+            Contact.birth_mmdd < birth_mmdd(day),
+            Contact.birth_mmdd,
+            Contact.id,
+        ).execution_options(yield_per=chunk_size)
+        result = await self.db.stream(stmt)
+        async for row in result:
+            yield row
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.future import select
+
+from src.entity.models import EmailOutbox
+
+MAX_BACKOFF = timedelta(hours=6)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OutboxRepository:
+    @staticmethod
+    def enqueue(
+        db: AsyncSession,
+        dedup_key: str,
+        recipient: str,
+        subject: str,
+        template_name: str,
+        template_body: dict,
+    ) -> EmailOutbox:
+        """Add a message to the caller's transaction; the caller commits."""
+        message = EmailOutbox(
+            dedup_key=dedup_key,
+            recipient=recipient,
+            subject=subject,
+            template_name=template_name,
+            template_body=template_body,
+            next_attempt_at=utcnow(),
+        )
+        db.add(message)
+        return message
+
+    @staticmethod
+    async def enqueue_many(db: AsyncSession, messages: list[dict]) -> int:
+        """Add messages whose dedup_key is new, in one statement; the caller
+        commits. Returns how many were added."""
+        if not messages:
+            return 0
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        stmt = (
+            dialect.insert(EmailOutbox)
+            .on_conflict_do_nothing(index_elements=[EmailOutbox.dedup_key])
+            .returning(EmailOutbox.id)
+        )
+        now = utcnow()
+        result = await db.execute(
+            stmt, [{**message, "next_attempt_at": now} for message in messages]
+        )
+        return len(result.all())
+
+    @staticmethod
+    async def claim_batch(
+        db: AsyncSession, limit: int, lease: timedelta, max_attempts: int
+    ):
+        """Lease up to ``limit`` due messages to this worker.
+
+        Claimed rows move to "sending" until ``lease`` expires, so a crashed
+        worker's messages are retried and concurrent workers skip them. An
+        expired lease counts as a failed attempt: a message that keeps
+        crashing or hanging the worker is failed after ``max_attempts``
+        instead of being reclaimed forever.
+        """
+        now = utcnow()
+        expired = (EmailOutbox.status == "sending") & (
+            EmailOutbox.next_attempt_at <= now
+        )
+        await db.execute(
+            update(EmailOutbox)
+            .where(expired, EmailOutbox.attempts + 1 >= max_attempts)
+            .values(
+                status="failed",
+                attempts=EmailOutbox.attempts + 1,
+                last_error="Lease expired before the message was sent",
+            )
+        )
+        result = await db.execute(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status.in_(("pending", "sending")),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        messages = result.scalars().all()
+        if messages:
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([message.id for message in messages]))
+                .values(
+                    status="sending",
+                    next_attempt_at=now + lease,
+                    attempts=EmailOutbox.attempts + case((expired, 1), else_=0),
+                ),
+                execution_options={"synchronize_session": False},
+            )
+            # Keep the returned rows in step, mark_failed counts from them
+            for message in messages:
+                attempts = message.attempts + (1 if message.status == "sending" else 0)
+                set_committed_value(message, "attempts", attempts)
+                set_committed_value(message, "status", "sending")
+        await db.commit()
+        return messages
+
+    @staticmethod
+    async def mark_sent(db: AsyncSession, message_id: int):
+        await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message_id)
+            .values(status="sent", sent_at=utcnow(), last_error=None)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def mark_failed(
+        db: AsyncSession,
+        message: EmailOutbox,
+        error: str,
+        max_attempts: int,
+        backoff: timedelta,
+    ):
+        attempts = message.attempts + 1
+        values = {"attempts": attempts, "last_error": error[:1000]}
+        if attempts >= max_attempts:
+            values["status"] = "failed"
+        else:
+            values["status"] = "pending"
+            delay = min(backoff * 2 ** (attempts - 1), MAX_BACKOFF)
+            values["next_attempt_at"] = utcnow() + delay
+
+        await db.execute(
+            update(EmailOutbox).where(EmailOutbox.id == message.id).values(**values)
+        )
+        await db.commit()
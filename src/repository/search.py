@@ -0,0 +1,63 @@
+import re
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.future import select
+
+from src.entity.models import Contact
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+contacts_fts = table("contacts_fts", column("rowid"))
+
+
+def tokenize(query: str) -> list[str]:
+    return [token.lower() for token in _TOKEN.findall(query)]
+
+
+class PostgresSearchEngine:
+    """Ranked prefix search over the generated ``search_vector`` column."""
+
+    def build(self, tokens: list[str], user_id: int, limit: int, offset: int):
+        tsquery = func.to_tsquery(
+            literal_column("'simple'::regconfig"),
+            " & ".join(f"{token}:*" for token in tokens),
+        )
+        vector = literal_column("contacts.search_vector")
+        return (
+            select(Contact)
+            .where(Contact.user_id == user_id, vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc(), Contact.id)
+            .limit(limit)
+            .offset(offset)
+        )
+
+
+class SqliteSearchEngine:
+    """FTS5 fallback with the same tokenization, used for SQLite runs."""
+
+    def build(self, tokens: list[str], user_id: int, limit: int, offset: int):
+        match = " AND ".join(f'"{token}"*' for token in tokens)
+        return (
+            select(Contact)
+            .join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+            .where(
+                Contact.user_id == user_id,
+                text("contacts_fts MATCH :match").bindparams(match=match),
+            )
+            .order_by(func.bm25(literal_column("contacts_fts")), Contact.id)
+            .limit(limit)
+            .offset(offset)
+        )
+
+
+ENGINES = {
+    "postgresql": PostgresSearchEngine(),
+    "sqlite": SqliteSearchEngine(),
+}
+
+
+def get_search_engine(dialect_name: str):
+    try:
+        return ENGINES[dialect_name]
+    except KeyError:
+        raise RuntimeError(f"Contact search is not supported on {dialect_name}")
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.entity.models import RevokedToken
+from src.repository.outbox import utcnow
+
+
+class RevokedTokenRepository:
+    @staticmethod
+    async def revoke(db: AsyncSession, jti: str, expires_at: datetime) -> bool:
+        """Record a revocation; return False if the token was already revoked."""
+        insert = (
+            postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        )
+        result = await db.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            .returning(RevokedToken.jti)
+        )
+        revoked = result.scalar_one_or_none() is not None
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < utcnow()))
+        await db.commit()
+        return revoked
+
+    @staticmethod
+    async def is_revoked(db: AsyncSession, jti: str) -> bool:
+        result = await db.execute(
+            select(RevokedToken.jti).where(RevokedToken.jti == jti)
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def revoked_since(db: AsyncSession, since: Optional[datetime]):
+        """Return ``(jti, revoked_at)`` for live revocations made after ``since``."""
+        stmt = select(RevokedToken.jti, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > utcnow()
+        )
+        if since is not None:
+            stmt = stmt.where(RevokedToken.revoked_at >= since)
+        result = await db.execute(stmt)
+        return result.all()
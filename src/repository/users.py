@@ -1,11 +1,18 @@
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from jose import jwt, JWTError
 
 from src.entity.models import User
 from src.schemas.users import UserCreate
-from src.conf.config import settings
-from src.utils.security import get_password_hash, verify_password  # Використовуємо функції з security.py
+from src.conf.cache import principal_cache
+from src.conf.email import verification_email
+from src.repository.outbox import OutboxRepository
+from src.services.tokens import decode_token
+from src.utils.tokens import TokenError
+from src.utils.security import (  # Використовуємо функції з security.py
+    get_password_hash_async,
+    verify_and_update_password,
+)
 
 
 class UserRepository:
@@ -15,29 +22,29 @@ class UserRepository:
         return result.scalar_one_or_none()
 
     @staticmethod
-    async def create(db: AsyncSession, user_data: UserCreate):
-        hashed_password = get_password_hash(user_data.password)
+    async def create(db: AsyncSession, user_data: UserCreate, verification_token: str):
+        hashed_password = await get_password_hash_async(user_data.password)
         user = User(email=user_data.email, hashed_password=hashed_password)
         db.add(user)
+        # Committed together with the user, so the email cannot be lost.
+        OutboxRepository.enqueue(
+            db, **verification_email(user.email, verification_token)
+        )
         await db.commit()
-        await db.refresh(user)
         return user
 
     @staticmethod
     async def verify_token(db: AsyncSession, token: str):
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            email = payload.get("sub")
-            if email is None:
-                return None
-        except JWTError:
+            email = decode_token(token, "verify")["sub"]
+        except TokenError:
             return None
 
         user = await UserRepository.get_by_email(db, email)
         if user and not user.is_verified:
             user.is_verified = True
             await db.commit()
-            await db.refresh(user)
+            await principal_cache.delete(user.email)
         return user
 
     @staticmethod
@@ -46,15 +53,28 @@ class UserRepository:
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password(
+            password, user.hashed_password
+        )
+        if not valid:
             return None
 
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+
         return user
 
     @staticmethod
-    async def update_avatar(db: AsyncSession, user: User, avatar_url: str) -> User:
-        user.avatar_url = avatar_url
-        db.add(user)
+    async def update_avatar(db: AsyncSession, user_id: int, avatars: dict) -> User:
+        largest = max(avatars, key=int)
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(avatar_url=avatars[largest], avatars=avatars)
+            .returning(User)
+        )
+        user = result.scalar_one()
         await db.commit()
-        await db.refresh(user)
-        return user
\ No newline at end of file
+        await principal_cache.delete(user.email)
+        return user
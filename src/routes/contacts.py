@@ -1,17 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.schemas.contacts import ContactCreate, ContactResponse
+from src.conf.config import settings
+from src.conf.events import contact_events
+from src.conf.limiter import limiter
+from src.database.db import client_key, get_db, get_read_db
+from src.schemas.contacts import (
+    BatchRequest,
+    BatchResponse,
+    BulkImportResult,
+    ContactChanges,
+    ContactCreate,
+    ContactResponse,
+    ContactPage,
+    PhoneMatch,
+)
 from src.schemas.users import UserResponse
 from src.services.contacts import ContactService
 from src.services.auth import get_current_user
+from src.utils.http_cache import (
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.utils.records import iter_csv, iter_ndjson, to_csv_line
+from src.utils.responses import ContactJSONResponse, dumps
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
+@limiter.limit(settings.RATE_LIMIT_CONTACTS_WRITE)
 async def create_contact(
+    request: Request,
     contact: ContactCreate,
     db: AsyncSession = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
@@ -20,38 +48,349 @@ async def create_contact(
     return await service.create_contact(contact, current_user)
 
 
-@router.get("/", response_model=list[ContactResponse])
+MAX_PAGE_SIZE = 500
+MAX_PHONE_LOOKUP = 100
+
+
+EXPORT_FIELDS = list(ContactResponse.model_fields)
+
+
+async def _ndjson(contacts):
+    async for contact in contacts:
+        yield dumps(contact) + b"\n"
+
+
+async def _csv(contacts):
+    yield to_csv_line(EXPORT_FIELDS)
+    async for contact in contacts:
+        data = ContactResponse.model_validate(contact).model_dump(mode="json")
+        yield to_csv_line([data[field] for field in EXPORT_FIELDS])
+
+
+async def _collection_etag(service: ContactService, user: UserResponse, *params):
+    # The per-user version changes on every contact write, so a matching
+    # client ETag can be answered without loading any rows.
+    version = await service.get_contacts_version(user)
+    return make_etag(user.id, version, *params)
+
+
+# Types of the keyset values in a page cursor, per sort order
+CURSOR_TYPES = {"id": (int,), "name": (str, str, int)}
+
+
+def _decode_page_cursor(cursor: str, order: str) -> list:
+    try:
+        position = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    types = CURSOR_TYPES[order]
+    # bool is an int subclass but never a valid key
+    if len(position) != len(types) or not all(
+        isinstance(value, kind) and not isinstance(value, bool)
+        for value, kind in zip(position, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+
+# List routes return rows the repository already shaped like ContactResponse,
+# so they skip response_model validation and are encoded by orjson directly.
+@router.get("/", response_model=ContactPage, response_class=ContactJSONResponse)
 async def get_contacts(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor"),
+    order: Literal["id", "name"] = Query("id"),
+    stream: bool = Query(False, description="Stream all contacts as NDJSON"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
+    if stream:
+        return StreamingResponse(
+            _ndjson(
+                ContactService.stream_contacts(
+                    current_user, order, sticky_key=client_key(request)
+                )
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    position = _decode_page_cursor(cursor, order) if cursor else None
+
     service = ContactService(db)
-    return await service.get_contacts(current_user)
+    etag = await _collection_etag(service, current_user, "list", limit, cursor, order)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+
+    contacts, next_position = await service.get_contacts(
+        current_user, limit, position, order
+    )
+    return ContactJSONResponse(
+        {
+            "items": contacts,
+            "next_cursor": encode_cursor(next_position) if next_position else None,
+        },
+        headers=headers,
+    )
 
 
-@router.get("/search", response_model=list[ContactResponse])
+@router.get(
+    "/search",
+    response_model=list[ContactResponse],
+    response_class=ContactJSONResponse,
+)
 async def search_contacts(
+    request: Request,
     query: str = Query(..., description="Search by name or email"),
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    service = ContactService(db)
+    etag = await _collection_etag(service, current_user, "search", query, limit, offset)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    contacts = await service.search_contacts(query, current_user, limit, offset)
+    return ContactJSONResponse(contacts, headers=headers)
+
+
+@router.get(
+    "/by-phone",
+    response_model=list[PhoneMatch],
+    response_class=ContactJSONResponse,
+)
+async def lookup_by_phone(
+    request: Request,
+    phone: list[str] = Query(
+        ...,
+        min_length=1,
+        max_length=MAX_PHONE_LOOKUP,
+        description="Phone number in any format; repeat to look up several",
+    ),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
+    """Find the contacts that have each of the given phone numbers.
+
+    Numbers are normalized to E.164 (PHONE_DEFAULT_REGION for numbers
+    without a country code), so "050 123 45 67" matches "+380501234567".
+    Results come back in request order, one entry per number.
+    """
     service = ContactService(db)
-    return await service.search_contacts(query, current_user)
+    etag = await _collection_etag(service, current_user, "by-phone", *phone)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    matches = await service.lookup_phones(phone, current_user)
+    return ContactJSONResponse(matches, headers=headers)
 
 
-@router.get("/birthdays", response_model=list[ContactResponse])
+@router.get(
+    "/birthdays",
+    response_model=list[ContactResponse],
+    response_class=ContactJSONResponse,
+)
 async def get_upcoming_birthdays(
+    request: Request,
+    days: int = Query(settings.BIRTHDAY_WINDOW_DAYS, ge=0, le=366),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    service = ContactService(db)
+    # The window moves with the calendar, so today's date is part of the tag
+    etag = await _collection_etag(
+        service, current_user, "birthdays", days, date.today()
+    )
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    contacts = await service.get_upcoming_birthdays(current_user, days)
+    return ContactJSONResponse(contacts, headers=headers)
+
+
+def _encode_sync_token(values: list) -> str:
+    return encode_cursor(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+
+
+def _parse_stamp(value: str) -> datetime:
+    stamp = datetime.fromisoformat(value)
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _decode_sync_token(token: str):
+    """Return ``(watermark, position)`` from a token made by _encode_sync_token."""
+    try:
+        watermark, stamp, contact_id, kind = decode_cursor(token)
+        watermark = watermark and _parse_stamp(watermark)
+        position = None
+        if stamp is not None:
+            if not isinstance(contact_id, int) or kind not in (0, 1):
+                raise ValueError("Invalid sync token")
+            position = (_parse_stamp(stamp), contact_id, kind)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return watermark, position
+
+
+@router.get(
+    "/changes", response_model=ContactChanges, response_class=ContactJSONResponse
+)
+async def get_changes(
+    request: Request,
+    since: Optional[str] = Query(
+        None,
+        description="sync_token from the previous response; omit for a full sync",
+    ),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    # Reads the primary: a lagging replica could hide writes behind the watermark
+    db: AsyncSession = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Contacts created, updated or deleted since ``since``.
+
+    Call again with the returned ``sync_token`` while ``has_more`` is true,
+    then keep the last token for the next sync. Changes near the end of the
+    previous sync may be sent twice, so apply them idempotently by id.
+    Returns 410 once a token outlives tombstone retention; start over with a
+    full sync then.
+    """
+    watermark, position = _decode_sync_token(since) if since else (None, None)
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if watermark and watermark < datetime.now(timezone.utc) - retention:
+        raise HTTPException(
+            status_code=410, detail="Sync token expired, start a full sync"
+        )
+
+    service = ContactService(db)
+    etag = await _collection_etag(service, current_user, "changes", since, limit)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+
+    page, token = await service.get_changes(current_user, limit, watermark, position)
+    page["sync_token"] = _encode_sync_token(token)
+    return ContactJSONResponse(page, headers=headers)
+
+
+async def _events(user_id: int):
+    # Subscribed here so the finally clause always unsubscribes
+    subscription = contact_events.subscribe(user_id)
+    try:
+        # The rate limit middleware holds the headers until the first chunk
+        yield b": connected\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), settings.CONTACT_STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            op, ids = message
+            yield b"event: " + op.encode() + b"\ndata: " + dumps({"ids": ids}) + b"\n\n"
+    finally:
+        contact_events.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_changes(current_user: UserResponse = Depends(get_current_user)):
+    """Server-sent events for the caller's contact writes, from any device.
+
+    Events are ``create``, ``update`` and ``delete`` with ``{"ids": [...]}``
+    as data; fetch the rows with ``/contacts/changes``. A ``reset`` event
+    means events were dropped (the client fell behind, or the server lost
+    its event source), so sync with ``/contacts/changes`` before relying on
+    events again.
+    """
+    if contact_events.subscriber_count(current_user.id) >= (
+        settings.CONTACT_STREAM_MAX_PER_USER
+    ):
+        raise HTTPException(status_code=429, detail="Too many open streams")
+    return StreamingResponse(
+        _events(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/bulk", response_model=BulkImportResult)
+@limiter.limit(settings.RATE_LIMIT_CONTACTS_WRITE)
+async def import_contacts(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, description="Defaults to the request Content-Type"
+    ),
+    on_conflict: Literal["skip", "upsert"] = Query("skip"),
+    batch_size: int = Query(500, ge=1, le=2000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    if format is None:
+        content_type = request.headers.get("Content-Type", "")
+        format = "csv" if content_type.startswith("text/csv") else "ndjson"
+    parse = iter_csv if format == "csv" else iter_ndjson
+
+    service = ContactService(db)
+    return await service.import_contacts(
+        parse(request.stream()), current_user, batch_size, on_conflict == "upsert"
+    )
+
+
+@router.post("/batch", response_model=BatchResponse)
+@limiter.limit(settings.RATE_LIMIT_CONTACTS_WRITE)
+async def apply_batch(
+    request: Request,
+    batch: BatchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
+    """Apply up to 500 create/update/delete operations in one transaction.
+
+    Each result carries an HTTP-style status. In ``atomic`` mode a single
+    failure leaves everything unapplied (424 on the other operations);
+    ``best_effort`` applies every operation that passes its checks.
+    """
     service = ContactService(db)
-    return await service.get_upcoming_birthdays(current_user)
+    return await service.apply_batch(
+        batch.operations, current_user, batch.mode == "atomic"
+    )
+
+
+@router.get("/export")
+async def export_contacts(
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("ndjson"),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    contacts = ContactService.stream_contacts(
+        current_user, sticky_key=client_key(request)
+    )
+    if format == "csv":
+        return StreamingResponse(
+            _csv(contacts),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="contacts.csv"'},
+        )
+    return StreamingResponse(_ndjson(contacts), media_type="application/x-ndjson")
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
 async def get_contact(
+    request: Request,
+    response: Response,
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
     service = ContactService(db)
@@ -60,12 +399,19 @@ async def get_contact(
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
+    etag = make_etag(contact.id, contact.updated_at.isoformat())
+    headers = cache_headers(etag, contact.updated_at)
+    if is_not_modified(request, etag, contact.updated_at):
+        return not_modified_response(headers)
+    response.headers.update(headers)
     return contact
 
 
 # Update an existing contact
 @router.put("/{contact_id}", response_model=ContactResponse)
+@limiter.limit(settings.RATE_LIMIT_CONTACTS_WRITE)
 async def update_contact(
+    request: Request,
     contact_id: int,
     updated_data: ContactCreate,
     db: AsyncSession = Depends(get_db),
@@ -81,15 +427,17 @@ async def update_contact(
 
 
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.limit(settings.RATE_LIMIT_CONTACTS_WRITE)
 async def delete_contact(
+    request: Request,
     contact_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
     service = ContactService(db)
-    contact = await service.delete_contact(contact_id, current_user)
+    deleted_id = await service.delete_contact(contact_id, current_user)
 
-    if contact is None:
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     return None
@@ -0,0 +1,126 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.conf.cache import contact_cache, principal_cache
+from src.conf.events import contact_events
+from src.conf.limiter import limiter
+from src.database.db import sessionmanager
+from src.services.metrics import registry
+from src.services.tokens import revocation_store
+from src.utils.security import password_hasher
+
+router = APIRouter()
+
+POOL_GAUGES = {
+    "checked_out": "Connections currently checked out",
+    "overflow": "Connections open beyond pool_size",
+    "saturation": "Checked-out connections / (pool_size + max_overflow)",
+}
+
+
+def _pool_metrics():
+    stats = sessionmanager.pool_stats()
+    pools = [("primary", stats)] + [
+        (f"replica{index}", replica) for index, replica in enumerate(stats["replicas"])
+    ]
+    for key, help in POOL_GAUGES.items():
+        yield (
+            f"db_pool_{key}",
+            "gauge",
+            help,
+            [({"pool": name}, pool[key]) for name, pool in pools if key in pool],
+        )
+    yield (
+        "db_pool_checkout_wait_seconds_total",
+        "counter",
+        "Time spent waiting for a pooled connection",
+        [({"pool": name}, pool["wait_seconds_total"]) for name, pool in pools],
+    )
+    yield (
+        "db_pool_checkouts_total",
+        "counter",
+        "Connection checkouts",
+        [({"pool": name}, pool["checkouts"]) for name, pool in pools],
+    )
+    yield (
+        "db_pool_timeouts_total",
+        "counter",
+        "Checkouts that timed out waiting for a connection",
+        [({"pool": name}, pool["timeouts"]) for name, pool in pools],
+    )
+
+
+def _auth_metrics():
+    yield (
+        "principal_cache_requests_total",
+        "counter",
+        "Principal cache lookups",
+        [
+            ({"result": "hit"}, principal_cache.hits),
+            ({"result": "miss"}, principal_cache.misses),
+        ],
+    )
+    yield (
+        "contact_cache_requests_total",
+        "counter",
+        "Contact query cache lookups",
+        [
+            ({"result": "hit"}, contact_cache.hits),
+            ({"result": "miss"}, contact_cache.misses),
+        ],
+    )
+    yield (
+        "token_revocation_checks_total",
+        "counter",
+        "Revocation checks answered by the bloom filter or confirmed in the DB",
+        [
+            ({"result": "filtered"}, revocation_store.filtered),
+            ({"result": "queried"}, revocation_store.queried),
+        ],
+    )
+    yield (
+        "password_hash_in_flight",
+        "gauge",
+        "Password hash operations running or queued",
+        [({}, password_hasher.in_flight)],
+    )
+    yield (
+        "password_hash_rejected_total",
+        "counter",
+        "Password hash operations rejected because the pool was full",
+        [({}, password_hasher.rejected)],
+    )
+
+
+def _event_metrics():
+    yield (
+        "contact_stream_subscribers",
+        "gauge",
+        "Open /contacts/stream connections",
+        [({}, contact_events.subscribers)],
+    )
+    yield (
+        "contact_events_delivered_total",
+        "counter",
+        "Contact events queued for stream subscribers",
+        [({}, contact_events.delivered)],
+    )
+    yield (
+        "contact_events_overflows_total",
+        "counter",
+        "Events that found a subscriber's queue full and reset it",
+        [({}, contact_events.overflows)],
+    )
+
+
+registry.add_collector(_pool_metrics)
+registry.add_collector(_auth_metrics)
+registry.add_collector(_event_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+@limiter.exempt
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
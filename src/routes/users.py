@@ -3,51 +3,68 @@ from fastapi import (
     Depends,
     HTTPException,
     status,
-    BackgroundTasks,
     Request,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
-from src.entity.models import User
-from src.schemas.users import UserCreate, UserResponse, Token
+from typing import Optional
+
+from src.schemas.users import RefreshTokenRequest, UserCreate, UserResponse, Token
 from src.repository.users import UserRepository
 from src.services.auth import (
-    create_access_token,
+    create_token_pair,
+    credentials_exception,
     get_current_user,
+    get_token_claims,
+)
+from src.services.tokens import (
+    decode_token,
+    issue_token,
+    revocation_store,
+    revoke_token,
 )
-from src.conf.email import send_verification_email
+from src.utils.tokens import TokenError
+from src.conf.config import settings
+from src.conf.limiter import ip_key, limiter
 from src.utils.security import get_password_hash
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
 from fastapi import UploadFile, File
-import cloudinary.uploader
+from src.services.avatars import (
+    AvatarTooLarge,
+    InvalidImage,
+    get_avatar_storage,
+    process_avatar,
+)
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-
-limiter = Limiter(key_func=get_remote_address)
+avatar_storage = get_avatar_storage()
 
 
 @router.post("/avatar", response_model=UserResponse)
 async def upload_avatar(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    result = cloudinary.uploader.upload(
-        file.file, public_id=f"user_{current_user.id}_avatar", overwrite=True
-    )
-    url = result.get("secure_url")
-    updated_user = await UserRepository.update_avatar(db, current_user, url)
+    try:
+        avatars = await process_avatar(file, current_user.id, avatar_storage)
+    except AvatarTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Avatar file is too large",
+        )
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    updated_user = await UserRepository.update_avatar(db, current_user.id, avatars)
     return updated_user
 
 
 @router.get("/me")
-@limiter.limit("5/minute")
+@limiter.limit(settings.RATE_LIMIT_ME)
 async def get_me(
     request: Request,
     current_user: UserResponse = Depends(get_current_user),
@@ -60,16 +77,14 @@ async def get_me(
 )
 async def register_user(
     user_data: UserCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     existing_user = await UserRepository.get_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=409, detail="User already exists")
 
-    new_user = await UserRepository.create(db, user_data)
-    token = create_access_token({"sub": new_user.email})
-    background_tasks.add_task(send_verification_email, new_user.email, token)
+    token = issue_token(user_data.email, "verify")
+    new_user = await UserRepository.create(db, user_data, token)
 
     return new_user
 
@@ -84,7 +99,10 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=ip_key)
+async def login(
+    request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_db)
+):
     user = await UserRepository.authenticate_user(
         db, user_data.email, user_data.password
     )
@@ -98,5 +116,40 @@ async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_403_FORBIDDEN, detail="Email is not verified"
         )
 
-    token = create_access_token({"sub": user.email})
-    return {"access_token": token, "token_type": "bearer"}
+    return create_token_pair(user.email)
+
+
+@router.post("/refresh", response_model=Token)
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=ip_key)
+async def refresh_tokens(
+    request: Request, body: RefreshTokenRequest, db: AsyncSession = Depends(get_db)
+):
+    try:
+        claims = decode_token(body.refresh_token, "refresh")
+    except TokenError:
+        raise credentials_exception()
+
+    # Refresh tokens are single use: rotating revokes the presented one, and
+    # presenting it again (a replay, or a concurrent refresh) is rejected.
+    if await revocation_store.is_revoked(db, claims["jti"]):
+        raise credentials_exception()
+    if not await revoke_token(db, claims):
+        raise credentials_exception()
+    return create_token_pair(claims["sub"])
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: Optional[RefreshTokenRequest] = None,
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db),
+):
+    await revoke_token(db, claims)
+    if body is not None:
+        try:
+            refresh_claims = decode_token(body.refresh_token, "refresh")
+        except TokenError:
+            refresh_claims = None
+        if refresh_claims is not None and refresh_claims["sub"] == claims["sub"]:
+            await revoke_token(db, refresh_claims)
+    return None
@@ -1,6 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Annotated, Literal, Optional, Union
+
+from src.utils.birthdays import as_utc
 
 
 class ContactCreate(BaseModel):
@@ -11,6 +13,10 @@ class ContactCreate(BaseModel):
     birth_date: datetime
     additional_info: Optional[str] = None
 
+    # SQLite drops the offset of an aware datetime, so store it as UTC
+    # everywhere; birth_mmdd is taken from the same UTC value.
+    _birth_date_utc = field_validator("birth_date")(as_utc)
+
 
 class ContactResponse(ContactCreate):
     id: int
@@ -20,3 +26,76 @@ class ContactResponse(ContactCreate):
 
     class Config:
         from_attributes = True
+
+
+class ContactPage(BaseModel):
+    items: list[ContactResponse]
+    next_cursor: Optional[str] = None
+
+
+class PhoneMatch(BaseModel):
+    phone: str
+    # None when the number could not be parsed
+    e164: Optional[str]
+    contacts: list[ContactResponse]
+
+
+class ContactChanges(BaseModel):
+    changed: list[ContactResponse]
+    deleted: list[int]
+    sync_token: str
+    has_more: bool
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
+    failed: int
+    errors: list[BulkRowError]
+
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    data: ContactCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: ContactCreate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[
+    Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")
+]
+
+
+class BatchRequest(BaseModel):
+    # atomic: nothing is applied unless every operation succeeds
+    mode: Literal["atomic", "best_effort"] = "atomic"
+    operations: list[BatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class BatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+    contact: Optional[ContactResponse] = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: list[BatchResult]
@@ -14,6 +14,7 @@ class UserResponse(BaseModel):
     email: str
     created_at: datetime
     avatar_url: Optional[str] = None
+    avatars: Optional[dict[str, str]] = None
 
     class Config:
         from_attributes = True
@@ -21,4 +22,9 @@ class UserResponse(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
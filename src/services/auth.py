@@ -1,54 +1,69 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
 from fastapi import HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.cache import principal_cache
 from src.database.db import get_db
 from src.schemas.users import UserResponse
 from src.repository.users import UserRepository
-from src.conf.config import settings
+from src.services.tokens import decode_token, issue_token, revocation_store
+from src.utils.tokens import TokenError
 # from src.utils.security import verify_password, get_password_hash  
 
 # OAuth2 for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
-# JWT Config
-SECRET_KEY = settings.SECRET_KEY  # Load from .env
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
 # Create a JWT access token
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (
-        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return issue_token(data["sub"], "access", expires_delta)
 
-# Get current user from JWT token
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> UserResponse:
-    credentials_exception = HTTPException(
+
+def create_token_pair(email: str) -> dict:
+    return {
+        "access_token": issue_token(email, "access"),
+        "refresh_token": issue_token(email, "refresh"),
+        "token_type": "bearer",
+    }
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+# Verified, unrevoked claims of the bearer access token
+async def get_token_claims(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        claims = decode_token(token, "access")
+    except TokenError:
+        raise credentials_exception()
+
+    if await revocation_store.is_revoked(db, claims["jti"]):
+        raise credentials_exception()
+    return claims
+
+
+# Get current user from JWT token
+async def get_current_user(
+    claims: dict = Depends(get_token_claims), db: AsyncSession = Depends(get_db)
+) -> UserResponse:
+    email = claims["sub"]
+    cached = await principal_cache.get(email)
+    if cached is not None:
+        return UserResponse(**cached)
 
     user = await UserRepository.get_by_email(db, email)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
 
-    return user
\ No newline at end of file
+    principal = UserResponse.model_validate(user)
+    await principal_cache.set(email, principal.model_dump(mode="json"))
+    return principal
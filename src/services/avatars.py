@@ -0,0 +1,99 @@
+import asyncio
+import io
+from pathlib import Path
+
+from fastapi import UploadFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import settings
+
+CHUNK_SIZE = 64 * 1024
+MAX_PIXELS = 40_000_000
+
+
+class AvatarTooLarge(Exception):
+    pass
+
+
+class InvalidImage(Exception):
+    pass
+
+
+class CloudinaryStorage:
+    def __init__(self):
+        import cloudinary.uploader
+
+        import src.conf.avatars  # noqa: F401  (configures the SDK)
+
+        self._upload = cloudinary.uploader.upload
+
+    async def save(self, key: str, data: bytes) -> str:
+        # The SDK is blocking, so the HTTP upload runs off the event loop.
+        result = await asyncio.to_thread(
+            self._upload, io.BytesIO(data), public_id=key, overwrite=True
+        )
+        return result["secure_url"]
+
+
+class LocalStorage:
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    async def save(self, key: str, data: bytes) -> str:
+        await asyncio.to_thread(self._write, self.root / f"{key}.jpg", data)
+        return f"{self.base_url}/{key}.jpg"
+
+
+def get_avatar_storage():
+    if settings.AVATAR_STORAGE == "local":
+        return LocalStorage(settings.AVATAR_LOCAL_DIR, settings.AVATAR_LOCAL_URL)
+    return CloudinaryStorage()
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Read the upload in chunks, giving up as soon as it exceeds ``max_bytes``."""
+    data = bytearray()
+    while chunk := await file.read(CHUNK_SIZE):
+        data += chunk
+        if len(data) > max_bytes:
+            raise AvatarTooLarge()
+    return bytes(data)
+
+
+def resize_avatar(data: bytes, sizes: list[int]) -> dict[int, bytes]:
+    """Validate an image and render square JPEG thumbnails for every size."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise InvalidImage("Image dimensions are too large")
+            image.verify()
+
+        renditions = {}
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            for size in sizes:
+                thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+                output = io.BytesIO()
+                thumbnail.save(output, format="JPEG", quality=85, optimize=True)
+                renditions[size] = output.getvalue()
+        return renditions
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage("Unsupported or corrupted image") from e
+
+
+async def process_avatar(file: UploadFile, user_id: int, storage) -> dict[str, str]:
+    """Return ``{size: url}`` for every configured avatar size."""
+    data = await read_upload(file, settings.AVATAR_MAX_BYTES)
+    renditions = await asyncio.to_thread(resize_avatar, data, settings.AVATAR_SIZES)
+    urls = await asyncio.gather(
+        *(
+            storage.save(f"user_{user_id}_avatar_{size}", content)
+            for size, content in renditions.items()
+        )
+    )
+    return {str(size): url for size, url in zip(renditions, urls)}
@@ -1,23 +1,138 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.conf.cache import contact_cache
+from src.conf.config import settings
+from src.database.db import sessionmanager
 from src.entity.models import Contact
-from src.repository.contacts import ContactRepository
+from src.repository.contacts import DELETED, ContactRepository, contact_values
 from src.schemas.contacts import ContactCreate
 from src.schemas.users import UserResponse
+from src.utils.phones import to_e164
+from src.utils.records import RecordError
+
+MAX_REPORTED_ERRORS = 100
 
 
 class ContactService:
     def __init__(self, db: AsyncSession):
         self.repository = ContactRepository(db)
+        self._version: Optional[int] = None
+
+    async def get_contacts_version(self, user: UserResponse) -> int:
+        """The owner's ``contacts_version``, which is also the cache generation.
+
+        Routes read it for the ETag first; cached reads then reuse it, so the
+        body and the ETag always describe the same version.
+        """
+        if self._version is None:
+            self._version = await self.repository.get_version(user)
+        return self._version
+
+    async def search_contacts(
+        self, query: str, user: UserResponse, limit: int = 50, offset: int = 0
+    ):
+        async def load():
+            return await self.repository.search_contacts(query, user, limit, offset)
+
+        version = await self.get_contacts_version(user)
+        return await contact_cache.get_or_load(
+            user.id, version, "search", [query, limit, offset], load
+        )
+
+    async def lookup_phones(self, phones: list[str], user: UserResponse):
+        """Match each of ``phones``, in any format, against the owner's contacts."""
+        normalized = [to_e164(phone) for phone in phones]
+        numbers = sorted({number for number in normalized if number})
 
-    async def search_contacts(self, query: str, user: UserResponse):
-        return await self.repository.search_contacts(query, user)
+        async def load():
+            return await self.repository.get_by_phones(numbers, user)
+
+        matches = {}
+        if numbers:
+            version = await self.get_contacts_version(user)
+            matches = await contact_cache.get_or_load(
+                user.id, version, "by-phone", numbers, load
+            )
+        return [
+            {"phone": phone, "e164": number, "contacts": matches.get(number, [])}
+            for phone, number in zip(phones, normalized)
+        ]
 
     async def create_contact(self, contact_data: ContactCreate, user: UserResponse):
         new_contact = Contact(**contact_data.model_dump(), user_id=user.id)
-        return await self.repository.create(new_contact)
+        contact = await self.repository.create(new_contact)
+        self._version = None
+        return contact
+
+    async def get_contacts(
+        self,
+        user: UserResponse,
+        limit: int,
+        cursor: Optional[list] = None,
+        order: str = "id",
+    ):
+        async def load():
+            contacts, next_cursor = await self.repository.get_page(
+                user, limit, cursor, order
+            )
+            return {"items": contacts, "next_cursor": next_cursor}
+
+        version = await self.get_contacts_version(user)
+        page = await contact_cache.get_or_load(
+            user.id, version, "list", [limit, cursor, order], load
+        )
+        return page["items"], page["next_cursor"]
 
-    async def get_contacts(self, user: UserResponse):
-        return await self.repository.get_all(user)
+    @staticmethod
+    async def stream_contacts(
+        user: UserResponse, order: str = "id", sticky_key: Optional[str] = None
+    ):
+        # The request-scoped session is closed before a streaming body is sent,
+        # so the export owns its session for the lifetime of the stream.
+        async with sessionmanager.read_session(sticky_key) as session:
+            async for contact in ContactRepository(session).stream_all(user, order):
+                yield contact
+
+    async def get_changes(
+        self,
+        user: UserResponse,
+        limit: int,
+        watermark: Optional[datetime] = None,
+        position: Optional[tuple] = None,
+    ):
+        """One page of delta sync.
+
+        ``watermark`` is the point before which the client has every change;
+        ``position`` the last change of the previous page, if this one
+        continues a sync. Returns the page and the ``[watermark, *position]``
+        to put in the next sync token.
+        """
+        if position is None and watermark is not None:
+            position = (watermark, None, DELETED)
+        changes, has_more = await self.repository.get_changes(user, limit, position)
+
+        # Only the newest change per id matters to the client
+        latest = {contact_id: contact for _, contact_id, _, contact in changes}
+        page = {
+            "changed": [contact for contact in latest.values() if contact is not None],
+            "deleted": [id_ for id_, contact in latest.items() if contact is None],
+            "has_more": has_more,
+        }
+        if has_more:
+            stamp, contact_id, kind, _ = changes[-1]
+            return page, [watermark, stamp, contact_id, kind]
+
+        # Writes are stamped when their transaction starts, so one still in
+        # flight now may commit with a stamp up to the overlap in the past.
+        # The next sync starts that far back; older changes were all seen.
+        overlap = timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        settled = await self.repository.current_time() - overlap
+        if watermark is None or settled > watermark:
+            watermark = settled
+        return page, [watermark, None, None, None]
 
     async def get_contact(self, contact_id: int, user: UserResponse):
         return await self.repository.get_by_id(contact_id, user)
@@ -25,10 +140,92 @@ class ContactService:
     async def update_contact(
         self, contact_id: int, updated_data: ContactCreate, user: UserResponse
     ):
-        return await self.repository.update(contact_id, updated_data, user)
+        contact = await self.repository.update(contact_id, updated_data, user)
+        if contact is not None:
+            self._version = None
+        return contact
 
     async def delete_contact(self, contact_id: int, user: UserResponse):
-        return await self.repository.delete(contact_id, user)
+        """Return the deleted contact's id, or None if it was not found."""
+        deleted_id = await self.repository.delete(contact_id, user)
+        if deleted_id is not None:
+            self._version = None
+        return deleted_id
+
+    async def apply_batch(self, operations: list, user: UserResponse, atomic: bool):
+        results, committed = await self.repository.apply_batch(operations, user, atomic)
+        if committed:
+            self._version = None
+        return {"committed": committed, "results": results}
+
+    async def get_upcoming_birthdays(self, user: UserResponse, days: int):
+        today = date.today()
+
+        async def load():
+            return await self.repository.get_upcoming_birthdays(user, days, today)
+
+        version = await self.get_contacts_version(user)
+        return await contact_cache.get_or_load(
+            user.id, version, "birthdays", [days, today], load
+        )
+
+    async def import_contacts(
+        self, records, user: UserResponse, batch_size: int, upsert: bool
+    ):
+        """Validate ``(row, record)`` pairs as they arrive and insert them in batches.
+
+        Only the current batch and at most MAX_REPORTED_ERRORS messages are
+        kept in memory, whatever the size of the upload.
+        """
+        report = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": []}
+        batch: dict[str, tuple[int, dict]] = {}
+
+        def note(row: int, message: str):
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": row, "error": message})
+
+        async def flush():
+            inserted, updated = await self.repository.insert_many(
+                [values for _, values in batch.values()], user, upsert
+            )
+            if inserted or updated:
+                self._version = None
+            for email, (row, _) in batch.items():
+                if email in inserted:
+                    report["inserted"] += 1
+                elif email in updated:
+                    report["updated"] += 1
+                else:
+                    report["skipped"] += 1
+                    note(row, f"Skipped: contact with email {email} already exists")
+            batch.clear()
+
+        async for row, record in records:
+            if isinstance(record, RecordError):
+                report["failed"] += 1
+                note(row, str(record))
+                continue
+            try:
+                data = ContactCreate.model_validate(record)
+            except ValidationError as e:
+                report["failed"] += 1
+                note(
+                    row,
+                    "; ".join(
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                        for error in e.errors()
+                    ),
+                )
+                continue
+
+            duplicate = batch.pop(data.email, None)
+            if duplicate is not None:
+                report["skipped"] += 1
+                note(duplicate[0], f"Skipped: email {data.email} repeated in row {row}")
+            batch[data.email] = (row, contact_values(data, user.id))
+            if len(batch) >= batch_size:
+                await flush()
 
-    async def get_upcoming_birthdays(self, user: UserResponse):
-        return await self.repository.get_upcoming_birthdays(user)
+        if batch:
+            await flush()
+        return report
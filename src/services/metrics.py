@@ -0,0 +1,126 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import settings
+from src.utils.metrics import Registry
+
+logger = logging.getLogger("uvicorn.error")
+
+MAX_LOGGED_STATEMENTS = 50
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements issued per HTTP request",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ("method", "route"),
+)
+DB_QUERIES = registry.counter(
+    "db_queries_total", "SQL statements executed", ("engine",)
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self, record_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Optional[list] = [] if record_statements else None
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc(engine=name)
+        stats = _request_stats.get()
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if (
+            stats.statements is not None
+            and len(stats.statements) < MAX_LOGGED_STATEMENTS
+        ):
+            stats.statements.append((elapsed, statement))
+
+
+class MetricsMiddleware:
+    """Records per-route latency and the SQL issued while serving each request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        slow_threshold = settings.SLOW_REQUEST_MS
+        stats = RequestStats(record_statements=slow_threshold is not None)
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+
+            REQUEST_LATENCY.observe(
+                elapsed, method=method, route=path, status=status_code
+            )
+            REQUEST_DB_QUERIES.observe(stats.queries, method=method, route=path)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=path)
+
+            if slow_threshold is not None and elapsed * 1000 >= slow_threshold:
+                logger.warning(
+                    "Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB\n%s",
+                    method,
+                    scope["path"],
+                    elapsed * 1000,
+                    stats.queries,
+                    stats.db_seconds * 1000,
+                    "\n".join(
+                        f"  [{seconds * 1000:.1f} ms] {statement}"
+                        for seconds, statement in stats.statements
+                    ),
+                )
@@ -0,0 +1,134 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.repository.tokens import RevokedTokenRepository
+from src.utils.bloom import BloomFilter
+from src.utils.cache import TTLCache
+from src.utils.tokens import DEFAULT_KID, KeyRing, TokenError
+
+keyring = KeyRing(
+    {DEFAULT_KID: settings.SECRET_KEY, **settings.JWT_KEYS}, settings.JWT_ACTIVE_KID
+)
+
+# token -> verified claims, so a signature is checked once per token rather
+# than on every request; entries never outlive the token's exp.
+_verified = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+TOKEN_LIFETIMES = {
+    "access": timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    "refresh": timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    "verify": timedelta(hours=settings.VERIFY_TOKEN_EXPIRE_HOURS),
+}
+
+
+def issue_token(
+    subject: str, token_type: str, expires_delta: Optional[timedelta] = None
+) -> str:
+    expire = datetime.now(timezone.utc) + (expires_delta or TOKEN_LIFETIMES[token_type])
+    return keyring.encode(
+        {"sub": subject, "typ": token_type, "jti": uuid.uuid4().hex, "exp": expire}
+    )
+
+
+def decode_token(token: str, token_type: str) -> dict:
+    """Verify signature, expiry and type; raise TokenError otherwise."""
+    claims = _verified.get(token)
+    if claims is None:
+        claims = keyring.decode(token)
+        remaining = claims.get("exp", 0) - time.time()
+        if remaining > 0:
+            _verified.set(token, claims, min(settings.TOKEN_CACHE_TTL, remaining))
+    elif claims["exp"] <= time.time():
+        raise TokenError("Signature has expired")
+
+    if claims.get("typ") != token_type or not (claims.get("sub") and claims.get("jti")):
+        raise TokenError(f"Not a valid {token_type} token")
+    return claims
+
+
+class RevocationStore:
+    """Revoked jtis: a bloom filter in front of the revoked_tokens table.
+
+    Almost every token is not revoked, and the filter answers that from
+    memory; only filter hits (real revocations or rare false positives) are
+    confirmed with a query. New rows are pulled into the filter every
+    REVOCATION_REFRESH_SECONDS and the filter is rebuilt every
+    REVOCATION_REBUILD_SECONDS to drop expired entries.
+    """
+
+    # Commit order can differ from revoked_at order; re-read a short overlap
+    OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, size_bits: int, hashes: int, refresh: float, rebuild: float):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.refresh_seconds = refresh
+        self.rebuild_seconds = rebuild
+        self._filter = BloomFilter(size_bits, hashes)
+        self._local: set[str] = set()
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at = float("-inf")
+        self._rebuilt_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self.filtered = 0
+        self.queried = 0
+
+    def add(self, jti: str):
+        self._filter.add(jti)
+        self._local.add(jti)
+
+    async def _refresh(self, db: AsyncSession):
+        now = time.monotonic()
+        rebuild = now - self._rebuilt_at > self.rebuild_seconds
+        if rebuild:
+            self._local = set()
+            self._watermark = None
+        rows = await RevokedTokenRepository.revoked_since(db, self._watermark)
+
+        target = BloomFilter(self.size_bits, self.hashes) if rebuild else self._filter
+        for jti, revoked_at in rows:
+            target.add(jti)
+            if self._watermark is None or revoked_at - self.OVERLAP > self._watermark:
+                self._watermark = revoked_at - self.OVERLAP
+        if rebuild:
+            # Revocations made by this process while the query ran
+            for jti in self._local:
+                target.add(jti)
+            self._filter = target
+            self._rebuilt_at = now
+        self._refreshed_at = now
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        if time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            async with self._lock:
+                if time.monotonic() - self._refreshed_at > self.refresh_seconds:
+                    await self._refresh(db)
+
+        if jti not in self._filter:
+            self.filtered += 1
+            return False
+        self.queried += 1
+        return await RevokedTokenRepository.is_revoked(db, jti)
+
+
+revocation_store = RevocationStore(
+    settings.REVOCATION_BLOOM_BITS,
+    settings.REVOCATION_BLOOM_HASHES,
+    settings.REVOCATION_REFRESH_SECONDS,
+    settings.REVOCATION_REBUILD_SECONDS,
+)
+
+
+async def revoke_token(db: AsyncSession, claims: dict) -> bool:
+    """Revoke a decoded token; return False if it had already been revoked."""
+    revoked = await RevokedTokenRepository.revoke(
+        db, claims["jti"], datetime.fromtimestamp(claims["exp"], timezone.utc)
+    )
+    revocation_store.add(claims["jti"])
+    return revoked
@@ -0,0 +1,46 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from typing import Union
+
+FULL_YEAR = [(101, 1231)]
+
+
+def as_utc(value: Union[date, datetime]) -> Union[date, datetime]:
+    # Postgres stores timestamptz as UTC, so an aware birth date falls on its
+    # UTC calendar day; naive values are taken as UTC already.
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value
+
+
+def birth_mmdd(value: Union[date, datetime]) -> int:
+    value = as_utc(value)
+    return value.month * 100 + value.day
+
+
+def mmdd_ranges(start: date, days: int) -> list[tuple[int, int]]:
+    """Inclusive ``birth_mmdd`` ranges covering ``start`` .. ``start + days``."""
+    if days >= 365:
+        return FULL_YEAR
+
+    end = start + timedelta(days=days)
+    start_key, end_key = birth_mmdd(start), birth_mmdd(end)
+    # Feb 29 birthdays are celebrated on Feb 28 in common years.
+    if end_key == 228 and not calendar.isleap(end.year):
+        end_key = 229
+
+    if end.year == start.year:
+        return [(start_key, end_key)]
+    return [(start_key, 1231), (101, end_key)]
+
+
+def next_birthday(birth_date: Union[date, datetime], today: date) -> date:
+    birth_date = as_utc(birth_date)
+    for year in (today.year, today.year + 1):
+        day = birth_date.day
+        if birth_date.month == 2 and day == 29 and not calendar.isleap(year):
+            day = 28
+        occurrence = date(year, birth_date.month, day)
+        if occurrence >= today:
+            return occurrence
+    raise AssertionError("unreachable")
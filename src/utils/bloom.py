@@ -0,0 +1,29 @@
+import hashlib
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings: no false negatives, rare false positives."""
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size = size_bits
+        self.hashes = hashes
+        self._bits = bytearray((size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
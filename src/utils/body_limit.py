@@ -0,0 +1,73 @@
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """Answers 413 once the body of a request to one route exceeds ``max_bytes``.
+
+    FastAPI parses a form before the endpoint runs, spooling every uploaded
+    file in full. This runs first: a request is refused on its
+    Content-Length, or as soon as a chunked body goes over the limit.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_name: str,
+        max_bytes: int,
+        detail: str = "Request body is too large",
+    ):
+        self.app = app
+        self.route_name = route_name
+        self.max_bytes = max_bytes
+        self.detail = detail
+        self._path = None
+
+    def _reject(self) -> JSONResponse:
+        return JSONResponse({"detail": self.detail}, status_code=413)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._path is None:
+            # Resolved on first use, once every router has been included
+            self._path = scope["app"].url_path_for(self.route_name)
+        if scope["path"] != self._path:
+            return await self.app(scope, receive, send)
+
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject()(scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            # Once the body is cut off, FastAPI answers 400 for the failed
+            # form parse; that response is replaced with the 413 below
+            if received <= self.max_bytes:
+                started = started or message["type"] == "http.response.start"
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if started:
+                raise
+        if received > self.max_bytes and not started:
+            await self._reject()(scope, receive, send)
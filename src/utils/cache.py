@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import orjson
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (value, time.monotonic() + (ttl or self.ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key: str):
+        self._cache.delete(key)
+
+
+class RedisBackend:
+    """Stores JSON values in any client speaking the redis-py asyncio API.
+
+    Datetimes are written as ISO strings and come back as strings.
+    """
+
+    def __init__(self, client, prefix: str, ttl: float):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.client.set(
+            self._key(key), orjson.dumps(value), px=int((ttl or self.ttl) * 1000)
+        )
+
+    async def delete(self, key: str):
+        await self.client.delete(self._key(key))
+
+
+class GenerationalCache:
+    """Per-owner result cache keyed by a generation, with single-flight loads.
+
+    The caller passes the owner's current generation, a value that changes
+    in the same transaction as every write to the owner's data (for contacts,
+    ``users.contacts_version``). A committed write is therefore seen by every
+    process, whoever made it, and old entries are never read again; they age
+    out of the backend through LRU/TTL. Concurrent misses for the same key
+    in this process share one load.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def hits(self) -> int:
+        return self.backend.hits
+
+    @property
+    def misses(self) -> int:
+        return self.backend.misses
+
+    @staticmethod
+    def _key(owner, generation: int, op: str, params) -> str:
+        digest = hashlib.blake2b(
+            json.dumps(params, default=str).encode(), digest_size=12
+        ).hexdigest()
+        return f"{owner}:{generation}:{op}:{digest}"
+
+    async def get_or_load(self, owner, generation: int, op: str, params, loader):
+        """Return the cached value or ``await loader()`` and store its result.
+
+        Values must be JSON-serialisable when a shared backend is used.
+        """
+        key = self._key(owner, generation, op, params)
+        value = await self.backend.get(key)
+        if value is not None:
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                return pending.result()
+            # The leading load failed; don't share its error
+            return await loader()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            await self.backend.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+
+def cache_stats(backend) -> dict:
+    return {"hits": backend.hits, "misses": backend.misses}
+
+
+def create_cache(prefix: str, maxsize: int, ttl: float, redis_url: Optional[str]):
+    if redis_url:
+        import redis.asyncio as redis
+
+        return RedisBackend(redis.from_url(redis_url), prefix, ttl)
+    return MemoryBackend(maxsize, ttl)
@@ -0,0 +1,220 @@
+"""Contact change events fanned out to ``GET /contacts/stream`` subscribers.
+
+Writers call ``publish`` inside their transaction; events reach subscribers
+only if it commits. ``MemoryEventBus`` delivers them within one process.
+``PostgresEventBus`` sends them with NOTIFY, so every worker's single
+LISTEN connection receives them and fans them out to its own subscribers.
+
+Each subscriber has a bounded queue. Publishing never waits for a slow
+client: when its queue is full, the queued events are replaced with one
+``reset``, telling the client to catch up through ``/contacts/changes``.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("uvicorn.error")
+
+CHANNEL = "contact_events"
+# NOTIFY payloads are limited to 8000 bytes
+IDS_PER_MESSAGE = 500
+PENDING = "contact_events"
+
+RESET = ("reset", [])
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    def deliver(self, message) -> bool:
+        """Queue ``message``; on overflow queue a reset instead and return False."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.reset()
+            return False
+        return True
+
+    def reset(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESET)
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[tuple[str, list[int]]]:
+        """Next ``(op, ids)`` message, or None once the bus has stopped."""
+        return await self.queue.get()
+
+
+class MemoryEventBus:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self.delivered = 0
+        self.overflows = 0
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscriber_count(self, user_id: int) -> int:
+        return len(self._subscribers.get(user_id, ()))
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def dispatch(self, user_id: int, op: str, ids: list[int]):
+        for subscription in self._subscribers.get(user_id, ()):
+            if subscription.deliver((op, ids)):
+                self.delivered += 1
+            else:
+                self.overflows += 1
+
+    def _reset_all(self):
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.reset()
+
+    async def publish(self, db: AsyncSession, user_id: int, op: str, ids: list[int]):
+        """Queue ``op`` ("create", "update" or "delete") on ``ids`` for commit."""
+        if ids:
+            db.info.setdefault(PENDING, []).append((self, user_id, op, list(ids)))
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+        self._subscribers = {}
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver(session):
+    for bus, user_id, op, ids in session.info.pop(PENDING, ()):
+        bus.dispatch(user_id, op, ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(PENDING, None)
+
+
+class PostgresEventBus(MemoryEventBus):
+    """Events travel through NOTIFY; one LISTEN connection per process.
+
+    The notification is part of the writer's transaction, so Postgres drops
+    it on rollback and delivers it to every listener on commit. When the
+    listener connection is lost, subscribers get a ``reset`` once it is back,
+    since notifications sent in between are gone.
+    """
+
+    def __init__(self, url: str, queue_size: int, keepalive: float = 30):
+        super().__init__(queue_size)
+        self.dsn = (
+            make_url(url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.keepalive = keepalive
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, db: AsyncSession, user_id: int, op: str, ids: list[int]):
+        for start in range(0, len(ids), IDS_PER_MESSAGE):
+            payload = json.dumps(
+                {
+                    "user_id": user_id,
+                    "op": op,
+                    "ids": ids[start : start + IDS_PER_MESSAGE],
+                }
+            )
+            await db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            self.dispatch(message["user_id"], message["op"], message["ids"])
+        except (ValueError, KeyError) as e:
+            logger.error(f"Malformed {CHANNEL} notification {payload!r}: {e}")
+
+    async def _listen(self):
+        import asyncpg
+
+        delay = 1
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Contact events listener cannot connect: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(CHANNEL, self._on_notify)
+                # Anything sent while the listener was down is lost
+                self._reset_all()
+                delay = 1
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        # Notices a connection that died without closing
+                        await asyncio.wait_for(
+                            connection.execute("SELECT 1"), self.keepalive
+                        )
+                logger.warning("Contact events listener connection closed")
+            except (
+                OSError,
+                asyncio.TimeoutError,
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError,
+            ) as e:
+                logger.warning(f"Contact events listener lost its connection: {e}")
+            finally:
+                connection.terminate()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await super().stop()
+
+
+def create_event_bus(backend: str, url: str, queue_size: int) -> MemoryEventBus:
+    if backend == "postgres":
+        return PostgresEventBus(url, queue_size)
+    return MemoryEventBus(queue_size)
@@ -0,0 +1,20 @@
+from typing import Optional
+
+import phonenumbers
+
+from src.conf.config import settings
+
+
+def to_e164(raw: str, region: Optional[str] = None) -> Optional[str]:
+    """``raw`` in E.164 form, or None if it cannot be a phone number.
+
+    Numbers without a country code are read as numbers of ``region``,
+    PHONE_DEFAULT_REGION by default.
+    """
+    try:
+        number = phonenumbers.parse(raw, region or settings.PHONE_DEFAULT_REGION)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_possible_number(number):
+        return None
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
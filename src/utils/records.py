@@ -0,0 +1,89 @@
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+
+class RecordError(ValueError):
+    def __init__(self, row: int, message: str):
+        super().__init__(message)
+        self.row = row
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]):
+    """Yield ``(row_number, dict | RecordError)`` for every non-empty line."""
+    row = 0
+    async for line in iter_lines(chunks):
+        row += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, RecordError(row, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield row, RecordError(row, "Expected a JSON object")
+            continue
+        yield row, record
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]):
+    """Yield ``(row_number, dict | RecordError)`` for every CSV record.
+
+    The first record is the header. Quoted fields may span several lines.
+    Empty cells become ``None``.
+    """
+    header = None
+    row = 0
+    buffered = []
+    async for line in iter_lines(chunks):
+        buffered.append(line)
+        text = "\n".join(buffered)
+        if text.count('"') % 2:
+            continue
+        buffered = []
+        if not text.strip():
+            continue
+
+        try:
+            (values,) = list(csv.reader(io.StringIO(text)))
+        except (csv.Error, ValueError) as e:
+            row += 1
+            yield row, RecordError(row, f"Invalid CSV: {e}")
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, RecordError(
+                row, f"Expected {len(header)} columns, got {len(values)}"
+            )
+            continue
+        yield row, {name: value or None for name, value in zip(header, values)}
+
+    if buffered:
+        row += 1
+        yield row, RecordError(row, "Unterminated quoted field")
+
+
+def to_csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
@@ -0,0 +1,13 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class ContactJSONResponse(ORJSONResponse):
+    """orjson encoder emitting the same datetime format as pydantic (``Z`` for UTC)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
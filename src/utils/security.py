@@ -1,9 +1,79 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
+from src.conf.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    At most ``workers`` hashes run at once and ``max_pending`` more may wait;
+    anything beyond that fails fast with PasswordHasherBusy. The pool is
+    started on first use, so the hasher survives ``shutdown`` (e.g. one app
+    lifespan ending before another starts in the same process).
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limit = workers + max_pending
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def _run(self, func, *args):
+        if self.in_flight >= self._limit:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self.in_flight += 1
+        try:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str):
+        return await self._run(
+            pwd_context.verify_and_update, plain_password, hashed_password
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when a rehash is due."""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,39 @@
+from jose import JWTError, jwt
+
+DEFAULT_KID = "default"
+
+
+class TokenError(Exception):
+    pass
+
+
+class KeyRing:
+    """Signs with the active key and verifies with whichever key ``kid`` names."""
+
+    def __init__(self, keys: dict[str, str], active_kid: str, algorithm="HS256"):
+        if active_kid not in keys:
+            raise ValueError(f"No signing key for active kid {active_kid!r}")
+        self.keys = keys
+        self.active_kid = active_kid
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(
+            claims,
+            self.keys[self.active_kid],
+            algorithm=self.algorithm,
+            headers={"kid": self.active_kid},
+        )
+
+    def decode(self, token: str) -> dict:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KID)
+        except JWTError as e:
+            raise TokenError(str(e))
+        key = self.keys.get(kid)
+        if key is None:
+            raise TokenError(f"Unknown signing key {kid!r}")
+        try:
+            return jwt.decode(token, key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise TokenError(str(e))
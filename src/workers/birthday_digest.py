@@ -0,0 +1,127 @@
+"""Queue one email per user listing their contacts' upcoming birthdays.
+
+    python -m src.workers.birthday_digest [--date 2026-10-18] [--days 7] [--send]
+
+Meant to run nightly. Users are walked in id order, BIRTHDAY_DIGEST_CHUNK_SIZE
+at a time: one statement finds the birthdays of every user in the chunk, and
+their digests go to the email outbox in the same transaction that advances
+the day's ``digest_runs`` checkpoint. A crashed run resumes after the last
+committed chunk, and a finished day is not sent twice (outbox dedup keys
+also guard against overlapping runs). Memory stays bounded by the chunk size
+whatever the number of users.
+
+Delivery is the outbox worker's job, over its single reused SMTP
+connection; ``--send`` drains the outbox here once the digests are queued.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date
+
+from src.conf.config import settings
+from src.conf.email import birthday_digest_email
+from src.database.db import sessionmanager
+from src.repository.digests import DigestRepository
+from src.repository.outbox import OutboxRepository, utcnow
+from src.utils.birthdays import next_birthday
+from src.workers import email_outbox
+
+logger = logging.getLogger("birthday_digest")
+
+KIND = "birthday"
+
+
+async def build_digests(rows, day: date, max_contacts: int):
+    """Yield one outbox message per owner from rows grouped by owner."""
+    owner = None
+    async for row in rows:
+        if owner is None or row.user_id != owner["user_id"]:
+            if owner is not None:
+                yield birthday_digest_email(**owner)
+            owner = {
+                "user_id": row.user_id,
+                "email": row.owner_email,
+                "day": day,
+                "birthdays": [],
+                "more": 0,
+            }
+        if len(owner["birthdays"]) < max_contacts:
+            owner["birthdays"].append(
+                {
+                    "first_name": row.first_name,
+                    "last_name": row.last_name,
+                    "phone_number": row.phone_number,
+                    "birthday": next_birthday(row.birth_date, day).isoformat(),
+                }
+            )
+        else:
+            owner["more"] += 1
+    if owner is not None:
+        yield birthday_digest_email(**owner)
+
+
+async def digest_chunk(day: date, days: int, chunk_size: int) -> bool:
+    """Queue the next chunk's digests; return False once the day is done."""
+    async with sessionmanager.session() as db:
+        repository = DigestRepository(db)
+        run = await repository.lock_run(KIND, day)
+        if run.finished_at is not None:
+            return False
+
+        upto = await repository.next_user_bound(run.last_user_id, chunk_size)
+        if upto is None:
+            run.finished_at = utcnow()
+            await db.commit()
+            logger.info(f"Birthday digests for {day}: {run.digests} queued")
+            return False
+
+        rows = repository.upcoming_birthdays(run.last_user_id, upto, day, days)
+        messages = [
+            message
+            async for message in build_digests(
+                rows, day, settings.BIRTHDAY_DIGEST_MAX_CONTACTS
+            )
+        ]
+        run.digests += await OutboxRepository.enqueue_many(db, messages)
+        run.last_user_id = upto
+        await db.commit()
+        logger.info(f"Processed users up to id {upto}, {run.digests} digests queued")
+        return True
+
+
+async def run(day: date, days: int, chunk_size: int):
+    sessionmanager.init()
+    try:
+        async with sessionmanager.session() as db:
+            await DigestRepository(db).start_run(KIND, day)
+        while await digest_chunk(day, days, chunk_size):
+            pass
+    finally:
+        await sessionmanager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="day the digest is for (default: today)",
+    )
+    parser.add_argument("--days", type=int, default=settings.BIRTHDAY_WINDOW_DAYS)
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.BIRTHDAY_DIGEST_CHUNK_SIZE
+    )
+    parser.add_argument(
+        "--send", action="store_true", help="send the queued emails before exiting"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.date, args.days, args.chunk_size))
+    if args.send:
+        asyncio.run(email_outbox.run(once=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Deliver queued emails from the ``email_outbox`` table.
+
+    python -m src.workers.email_outbox [--once]
+
+Runs separately from the web workers and sends over a single SMTP
+connection that is reused across batches and reopened when it drops.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+
+from src.conf.config import settings
+from src.conf.email import conf
+from src.database.db import sessionmanager
+from src.entity.models import EmailOutbox
+from src.repository.outbox import OutboxRepository
+
+logger = logging.getLogger("email_outbox")
+
+
+class SmtpSender:
+    def __init__(self, config=conf):
+        self.config = config
+        self.templates = config.template_engine()
+        self._smtp = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+            timeout=self.config.TIMEOUT,
+        )
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(
+                self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value()
+            )
+        return smtp
+
+    def render(self, message: EmailOutbox) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = formataddr((self.config.MAIL_FROM_NAME, self.config.MAIL_FROM))
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        html = self.templates.get_template(message.template_name).render(
+            **message.template_body
+        )
+        email.set_content(html, subtype="html")
+        return email
+
+    async def send(self, message: EmailOutbox):
+        email = self.render(message)
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = await self._connect()
+        try:
+            await self._smtp.send_message(email)
+        except aiosmtplib.SMTPServerDisconnected:
+            self._smtp = await self._connect()
+            await self._smtp.send_message(email)
+
+    async def close(self):
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+
+async def drain_once(sender: SmtpSender, batch_size: int) -> int:
+    """Send one batch of due messages; return how many were claimed."""
+    async with sessionmanager.session() as db:
+        messages = await OutboxRepository.claim_batch(
+            db,
+            batch_size,
+            timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+            settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        )
+        for message in messages:
+            try:
+                await sender.send(message)
+            except Exception as e:
+                logger.warning(f"Sending outbox message {message.id} failed: {e}")
+                await sender.close()
+                await OutboxRepository.mark_failed(
+                    db,
+                    message,
+                    str(e),
+                    settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                    timedelta(seconds=settings.EMAIL_OUTBOX_BACKOFF_SECONDS),
+                )
+            else:
+                await OutboxRepository.mark_sent(db, message.id)
+        return len(messages)
+
+
+async def run(once: bool = False):
+    sessionmanager.init()
+    sender = SmtpSender()
+    try:
+        while True:
+            claimed = await drain_once(sender, settings.EMAIL_OUTBOX_BATCH_SIZE)
+            if claimed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                if once:
+                    break
+                await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_SECONDS)
+    finally:
+        await sender.close()
+        await sessionmanager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--once", action="store_true", help="exit when the outbox is empty"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
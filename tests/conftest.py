@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+for name in (
+    "SECRET_KEY",
+    "MAIL_USERNAME",
+    "MAIL_PASSWORD",
+    "MAIL_SERVER",
+    "CLOUDINARY_NAME",
+    "CLOUDINARY_API_KEY",
+    "CLOUDINARY_API_SECRET",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("MAIL_FROM", "test@example.com")
+os.environ.setdefault("MAIL_PORT", "465")
+os.environ["AVATAR_STORAGE"] = "local"
+os.environ["AVATAR_LOCAL_DIR"] = tempfile.mkdtemp()
+os.environ.pop("REDIS_URL", None)
+
+import httpx
+import pytest
+
+from main import app
+from src.conf.cache import contact_cache, principal_cache
+from src.database.db import sessionmanager
+from src.entity.models import Base, User
+from src.services.auth import create_access_token
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """Client for the app on a fresh database, with the lifespan running."""
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    for cache in (principal_cache, contact_cache.backend):
+        cache._cache.clear()
+
+    async with app.router.lifespan_context(app):
+        async with sessionmanager.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
+
+
+@pytest.fixture
+async def user(client):
+    async with sessionmanager.session() as session:
+        user = User(email="owner@example.com", hashed_password="-", is_verified=True)
+        session.add(user)
+        await session.commit()
+        return user
+
+
+@pytest.fixture
+def auth(user):
+    token = create_access_token({"sub": user.email})
+    return {"Authorization": f"Bearer {token}"}
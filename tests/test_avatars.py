@@ -0,0 +1,85 @@
+import io
+
+import pytest
+from PIL import Image
+
+from src.conf.config import settings
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = "avatar-boundary"
+CHUNK = 64 * 1024
+
+
+def multipart(data: bytes) -> bytes:
+    return (
+        (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode()
+        + data
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+
+class Upload:
+    """Request body that records how much of it the server pulled."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.sent = 0
+
+    async def __aiter__(self):
+        for start in range(0, len(self.body), CHUNK):
+            self.sent += CHUNK
+            yield self.body[start : start + CHUNK]
+
+
+def headers(auth, **extra):
+    return {
+        **auth,
+        "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+        **extra,
+    }
+
+
+@pytest.fixture
+def avatar_url(client):
+    return client._transport.app.url_path_for("upload_avatar")
+
+
+async def test_oversized_upload_is_refused_on_content_length(client, auth, avatar_url):
+    upload = Upload(multipart(b"\0" * (settings.AVATAR_MAX_BYTES + 1024 * 1024)))
+    response = await client.post(
+        avatar_url,
+        content=upload,
+        headers=headers(auth, **{"Content-Length": str(len(upload.body))}),
+    )
+
+    assert response.status_code == 413
+    assert upload.sent == 0
+
+
+async def test_oversized_chunked_upload_is_cut_off(client, auth, avatar_url):
+    upload = Upload(multipart(b"\0" * (settings.AVATAR_MAX_BYTES * 2)))
+    response = await client.post(avatar_url, content=upload, headers=headers(auth))
+
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Avatar file is too large"}
+    assert upload.sent <= settings.AVATAR_MAX_BYTES + 128 * 1024
+
+
+async def test_avatar_within_limit_is_stored(client, auth, avatar_url):
+    image = io.BytesIO()
+    Image.new("RGB", (300, 200), "red").save(image, format="PNG")
+    response = await client.post(
+        avatar_url,
+        files={"file": ("a.png", image.getvalue(), "image/png")},
+        headers=auth,
+    )
+
+    assert response.status_code == 200
+    assert set(response.json()["avatars"]) == {
+        str(size) for size in settings.AVATAR_SIZES
+    }
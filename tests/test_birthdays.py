@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.database.db import sessionmanager
+from src.entity.models import Contact
+from src.schemas.contacts import ContactCreate
+from src.utils.birthdays import birth_mmdd, mmdd_ranges, next_birthday
+
+KYIV = timezone(timedelta(hours=3))
+
+
+def test_birth_mmdd_uses_the_utc_day():
+    # 1990-10-20 00:00 at +03:00 is 1990-10-19 21:00 UTC
+    assert birth_mmdd(datetime(1990, 10, 20, tzinfo=KYIV)) == 1019
+    assert birth_mmdd(datetime(1990, 10, 20, 12, tzinfo=KYIV)) == 1020
+    assert birth_mmdd(datetime(1990, 10, 20)) == 1020
+    assert birth_mmdd(date(1990, 10, 20)) == 1020
+
+
+def test_next_birthday_agrees_with_birth_mmdd():
+    birth_date = datetime(1990, 10, 20, tzinfo=KYIV)
+    upcoming = next_birthday(birth_date, date(2026, 10, 18))
+    assert upcoming == date(2026, 10, 19)
+    assert birth_mmdd(upcoming) == birth_mmdd(birth_date)
+
+
+def test_next_birthday_feb_29_in_common_year():
+    assert next_birthday(datetime(2000, 2, 29), date(2027, 2, 1)) == date(2027, 2, 28)
+
+
+def test_mmdd_ranges_wrap_the_year():
+    assert mmdd_ranges(date(2026, 12, 29), 7) == [(1229, 1231), (101, 105)]
+
+
+def test_schema_stores_birth_date_as_utc():
+    data = ContactCreate(
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        phone_number="+380501234567",
+        birth_date="1990-10-20T00:00:00+03:00",
+    )
+    assert data.birth_date == datetime(1990, 10, 19, 21, tzinfo=timezone.utc)
+
+
+@pytest.mark.anyio
+async def test_offset_birth_date_is_stored_on_its_utc_day(client, auth):
+    contact = {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": "ada@example.com",
+        "phone_number": "+380501234567",
+        "birth_date": "1990-10-20T00:00:00+03:00",
+    }
+    response = await client.post("/contacts/", json=contact, headers=auth)
+    assert response.status_code == 201
+
+    async with sessionmanager.session() as session:
+        stored = (await session.execute(select(Contact))).scalar_one()
+    assert stored.birth_mmdd == 1019
+    assert next_birthday(stored.birth_date, date(2026, 10, 1)) == date(2026, 10, 19)
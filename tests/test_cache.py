@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from src.utils.cache import GenerationalCache, RedisBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def backend(server, prefix="test", ttl=60):
+    """A RedisBackend as one worker would build it, on the shared server."""
+    return RedisBackend(FakeRedis(server=server), prefix, ttl)
+
+
+async def test_values_round_trip_as_json(server):
+    cache = backend(server)
+    stamp = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+    assert await cache.get("key") is None
+    await cache.set("key", {"id": 1, "at": stamp, "tags": ["a"]})
+
+    assert await cache.get("key") == {
+        "id": 1,
+        "at": "2026-01-02T03:04:05+00:00",
+        "tags": ["a"],
+    }
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_keys_are_prefixed_and_expire(server):
+    cache = backend(server, ttl=60)
+    await cache.set("default", 1)
+    await cache.set("short", 1, ttl=0.5)
+
+    client = FakeRedis(server=server)
+    assert 59_000 < await client.pttl("test:default") <= 60_000
+    assert 0 < await client.pttl("test:short") <= 500
+    assert await client.exists("default") == 0
+
+
+async def test_workers_share_entries_and_deletes(server):
+    first, second = backend(server), backend(server)
+    await first.set("owner@example.com", {"id": 1})
+
+    assert await second.get("owner@example.com") == {"id": 1}
+    await second.delete("owner@example.com")
+    assert await first.get("owner@example.com") is None
+
+
+async def test_generational_cache_loads_once_across_workers(server):
+    first = GenerationalCache(backend(server))
+    second = GenerationalCache(backend(server))
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return {"items": [len(loads)]}
+
+    assert await first.get_or_load(1, 7, "list", [50], loader) == {"items": [1]}
+    assert await second.get_or_load(1, 7, "list", [50], loader) == {"items": [1]}
+    assert len(loads) == 1
+
+    # A write bumps the version, which no entry was stored under yet
+    assert await second.get_or_load(1, 8, "list", [50], loader) == {"items": [2]}
+    assert await first.get_or_load(2, 7, "list", [50], loader) == {"items": [3]}
+
+
+async def test_principal_is_served_from_redis(client, auth, server, monkeypatch):
+    import src.services.auth
+
+    cache = backend(server, prefix="principal")
+    monkeypatch.setattr(src.services.auth, "principal_cache", cache)
+
+    me = client._transport.app.url_path_for("get_me")
+    first = await client.get(me, headers=auth)
+    second = await client.get(me, headers=auth)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,85 @@
+import pytest
+
+from src.database.db import sessionmanager
+from src.entity.models import Contact
+from src.repository.contacts import ContactRepository
+from src.schemas.contacts import ContactCreate
+from src.utils.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "email": "ada@example.com",
+    "phone_number": "+380501234567",
+    "birth_date": "1990-10-20T00:00:00",
+}
+
+
+@pytest.mark.parametrize(
+    "order, values",
+    [
+        ("id", [{"a": 1}]),
+        ("id", ["abc"]),
+        ("id", [True]),
+        ("id", [1, 2]),
+        ("name", ["Last", "First", "1"]),
+        ("name", [1, "First", 1]),
+        ("name", ["Last", "First"]),
+    ],
+)
+async def test_malformed_cursor_is_rejected(client, auth, order, values):
+    response = await client.get(
+        "/contacts/",
+        params={"cursor": encode_cursor(values), "order": order},
+        headers=auth,
+    )
+    assert response.status_code == 400
+
+
+async def test_garbage_cursor_is_rejected(client, auth):
+    response = await client.get(
+        "/contacts/", params={"cursor": "not base64!"}, headers=auth
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("order", ["id", "name"])
+async def test_cursor_pages_through_contacts(client, auth, order):
+    for i in range(3):
+        contact = {**CONTACT, "first_name": f"Ada{i}", "email": f"ada{i}@example.com"}
+        response = await client.post("/contacts/", json=contact, headers=auth)
+        assert response.status_code == 201
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "order": order, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/contacts/", params=params, headers=auth)).json()
+        seen += [contact["first_name"] for contact in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == ["Ada0", "Ada1", "Ada2"]
+
+
+async def test_list_cache_sees_writes_from_other_processes(client, auth, user):
+    await client.post("/contacts/", json=CONTACT, headers=auth)
+    first = await client.get("/contacts/", headers=auth)
+    assert len(first.json()["items"]) == 1
+
+    # A write that bypasses this process's service, e.g. another worker
+    async with sessionmanager.session() as session:
+        data = ContactCreate(**{**CONTACT, "email": "grace@example.com"})
+        await ContactRepository(session).create(
+            Contact(**data.model_dump(), user_id=user.id)
+        )
+
+    second = await client.get("/contacts/", headers=auth)
+    assert second.headers["etag"] != first.headers["etag"]
+    assert len(second.json()["items"]) == 2
+
+    revalidated = await client.get(
+        "/contacts/", headers={**auth, "If-None-Match": second.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
@@ -0,0 +1,182 @@
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi_mail import ConnectionConfig
+from sqlalchemy import select, update
+
+from src.conf.config import settings
+from src.conf.email import conf, verification_email
+from src.database.db import sessionmanager
+from src.entity.models import EmailOutbox
+from src.repository.outbox import OutboxRepository
+from src.workers.email_outbox import SmtpSender, drain_once
+
+pytestmark = pytest.mark.anyio
+
+BACKOFF = 30
+
+
+class Mailbox:
+    """aiosmtpd handler that keeps delivered messages and can refuse them."""
+
+    def __init__(self):
+        self.messages = []
+        self.refuse = False
+        self.port = None
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.refuse:
+            return "451 Try again later"
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mailbox():
+    mailbox = Mailbox()
+    controller = Controller(mailbox, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    mailbox.port = controller.port
+    yield mailbox
+    controller.stop()
+
+
+@pytest.fixture
+async def sender(mailbox, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", BACKOFF)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 3)
+    sender = SmtpSender(
+        ConnectionConfig(
+            MAIL_USERNAME="",
+            MAIL_PASSWORD="",
+            MAIL_FROM="noreply@example.com",
+            MAIL_PORT=mailbox.port,
+            MAIL_SERVER="127.0.0.1",
+            MAIL_STARTTLS=False,
+            MAIL_SSL_TLS=False,
+            USE_CREDENTIALS=False,
+            TEMPLATE_FOLDER=conf.TEMPLATE_FOLDER,
+        )
+    )
+    yield sender
+    await sender.close()
+
+
+async def enqueue(*emails: str):
+    async with sessionmanager.session() as db:
+        for email in emails:
+            OutboxRepository.enqueue(db, **verification_email(email, "token"))
+        await db.commit()
+
+
+async def outbox() -> list[EmailOutbox]:
+    async with sessionmanager.session() as db:
+        result = await db.execute(select(EmailOutbox).order_by(EmailOutbox.id))
+        return result.scalars().all()
+
+
+async def make_due():
+    async with sessionmanager.session() as db:
+        await db.execute(
+            update(EmailOutbox).values(
+                next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+            )
+        )
+        await db.commit()
+
+
+def seconds_until(moment: datetime) -> float:
+    # SQLite hands datetimes back without their offset
+    moment = moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    return (moment - datetime.now(timezone.utc)).total_seconds()
+
+
+async def test_batch_is_delivered_over_smtp(client, mailbox, sender):
+    await enqueue("a@example.com", "b@example.com")
+
+    assert await drain_once(sender, batch_size=10) == 2
+
+    delivered = mailbox.messages
+    assert [envelope.rcpt_tos for envelope in delivered] == [
+        ["a@example.com"],
+        ["b@example.com"],
+    ]
+    assert b"Subject: Verify your email" in delivered[0].content
+    assert [message.status for message in await outbox()] == ["sent", "sent"]
+    assert await drain_once(sender, batch_size=10) == 0
+
+
+async def test_refused_message_backs_off_then_fails(client, mailbox, sender):
+    mailbox.refuse = True
+    await enqueue("a@example.com")
+
+    for attempt in (1, 2):
+        assert await drain_once(sender, batch_size=10) == 1
+        (message,) = await outbox()
+        assert (message.status, message.attempts) == ("pending", attempt)
+        assert "451" in message.last_error
+        delay = BACKOFF * 2 ** (attempt - 1)
+        assert delay - 5 < seconds_until(message.next_attempt_at) <= delay
+        # Not due again until the backoff has passed
+        assert await drain_once(sender, batch_size=10) == 0
+        await make_due()
+
+    assert await drain_once(sender, batch_size=10) == 1
+    (message,) = await outbox()
+    assert (message.status, message.attempts) == ("failed", 3)
+    assert mailbox.messages == []
+
+
+async def test_expired_lease_is_reclaimed(client, mailbox, sender):
+    await enqueue("a@example.com")
+    # A worker claims the message and dies before sending it
+    async with sessionmanager.session() as db:
+        await OutboxRepository.claim_batch(db, 10, timedelta(minutes=5), 3)
+
+    assert await drain_once(sender, batch_size=10) == 0
+    assert mailbox.messages == []
+
+    await make_due()
+    assert await drain_once(sender, batch_size=10) == 1
+    assert len(mailbox.messages) == 1
+    assert [message.status for message in await outbox()] == ["sent"]
+
+
+async def test_message_that_keeps_losing_its_lease_fails(client, mailbox, sender):
+    await enqueue("a@example.com")
+
+    # Every worker that claims it dies before recording the outcome
+    for attempts in (0, 1, 2):
+        async with sessionmanager.session() as db:
+            claimed = await OutboxRepository.claim_batch(db, 10, timedelta(0), 3)
+        assert [message.attempts for message in claimed] == [attempts]
+        await make_due()
+
+    async with sessionmanager.session() as db:
+        assert await OutboxRepository.claim_batch(db, 10, timedelta(0), 3) == []
+    (message,) = await outbox()
+    assert (message.status, message.attempts) == ("failed", 3)
+    assert message.last_error == "Lease expired before the message was sent"
+    assert await drain_once(sender, batch_size=10) == 0
+    assert mailbox.messages == []
+
+
+async def test_send_failure_after_reclaim_keeps_the_count(client, mailbox, sender):
+    mailbox.refuse = True
+    await enqueue("a@example.com")
+    async with sessionmanager.session() as db:
+        await OutboxRepository.claim_batch(db, 10, timedelta(0), 3)
+    await make_due()
+
+    assert await drain_once(sender, batch_size=10) == 1
+    (message,) = await outbox()
+    # One attempt for the lost lease, one for the refused send
+    assert (message.status, message.attempts) == ("pending", 2)
@@ -0,0 +1,73 @@
+import fakeredis
+import httpx
+import pytest
+import redis
+from fastapi import FastAPI
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+
+from main import rate_limit_handler
+from src.conf.limiter import RateLimitMiddleware, user_or_ip_key
+from src.services.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def pool():
+    """Connection pool to one fake Redis server, shared by every worker."""
+    return redis.ConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer()
+    )
+
+
+def worker(pool) -> FastAPI:
+    """An app process limiting like the real one, on the shared Redis."""
+    app = FastAPI()
+    app.state.limiter = Limiter(
+        key_func=user_or_ip_key,
+        key_style="endpoint",
+        default_limits=["3/minute"],
+        storage_uri="redis://",
+        storage_options={"connection_pool": pool},
+        strategy="sliding-window-counter",
+        key_prefix="contacts-api",
+    )
+    app.add_middleware(RateLimitMiddleware)
+    app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+
+async def get(app: FastAPI, headers: dict) -> int:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return (await c.get("/ping", headers=headers)).status_code
+
+
+def bearer(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+
+async def test_workers_share_one_limit(pool):
+    first, second = worker(pool), worker(pool)
+    alice = bearer("alice@example.com")
+
+    statuses = [await get(app, alice) for app in (first, second, first, second)]
+
+    assert statuses == [200, 200, 200, 429]
+
+
+async def test_limit_is_per_user(pool):
+    first, second = worker(pool), worker(pool)
+    for app in (first, second, first):
+        assert await get(app, bearer("alice@example.com")) == 200
+
+    assert await get(second, bearer("alice@example.com")) == 429
+    assert await get(second, bearer("bob@example.com")) == 200
+    # Anonymous callers are counted per IP instead
+    assert await get(first, {}) == 200
@@ -0,0 +1,23 @@
+import pytest
+
+from main import app
+from src.utils.security import PasswordHasher, password_hasher, verify_password
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_hasher_works_after_shutdown():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    hashed = await hasher.hash("secret")
+    hasher.shutdown()
+
+    valid, _ = await hasher.verify_and_update("secret", hashed)
+    assert valid
+    hasher.shutdown()
+
+
+async def test_shared_hasher_survives_app_restarts():
+    for _ in range(2):
+        async with app.router.lifespan_context(app):
+            hashed = await password_hasher.hash("secret")
+            assert verify_password("secret", hashed)